@@ -1,2 +1,10 @@
-from . import db, utils, charts, geo
-__all__ = ["db", "utils", "charts", "geo"]
+import importlib
+
+__all__ = ["db", "utils", "charts", "geo", "dataio", "jobs", "overdue", "owners", "reports"]
+
+# Submodules load on first access: `charts` pulls in plotly and `geo` builds
+# pydeck layers, which most pages never need.
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
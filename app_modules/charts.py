@@ -1,6 +1,8 @@
+import numpy as np
 import pandas as pd
 import plotly.express as px
-from .utils import coerce_date
+from .utils import parse_dates
+from .overdue import AGING_BUCKETS, overdue_mask, summarize
 
 def status_funnel(tasks_df: pd.DataFrame):
     if tasks_df.empty:
@@ -11,10 +13,11 @@ def status_funnel(tasks_df: pd.DataFrame):
 def tasks_histogram(tasks_df: pd.DataFrame, field="due_date"):
     if tasks_df.empty or field not in tasks_df.columns:
         return px.histogram(pd.DataFrame({"Date": []}), x="Date", title="Task Timeline")
-    df = tasks_df.copy()
-    df[field] = df[field].apply(coerce_date)
-    df = df.dropna(subset=[field])
-    return px.histogram(df, x=field, nbins=24, title=f"Histogram • {field.replace('_',' ').title()}" )
+    # Pre-count per day so the figure carries one point per date, not per task.
+    counts = parse_dates(tasks_df[field]).dropna().value_counts().rename_axis(field).reset_index(name="count")
+    fig = px.histogram(counts, x=field, y="count", histfunc="sum", nbins=24,
+                       title=f"Histogram • {field.replace('_',' ').title()}")
+    return fig.update_layout(yaxis_title="count")
 
 def workload_by_industry(tasks_df: pd.DataFrame, clients_df: pd.DataFrame, industries_df: pd.DataFrame):
     if tasks_df.empty:
@@ -28,26 +31,30 @@ def workload_by_industry(tasks_df: pd.DataFrame, clients_df: pd.DataFrame, indus
 def on_time_completion(tasks_df: pd.DataFrame):
     if tasks_df.empty:
         return px.pie(pd.DataFrame({"Status": [], "Count": []}), names="Status", values="Count", title="On-time vs Late")
-    df = tasks_df.copy()
-    df["due"] = df["due_date"].apply(coerce_date)
-    df["done"] = df["completed_date"].apply(coerce_date)
-    def classify(row):
-        if row["status"] != "Completed" or pd.isna(row["done"]):
-            return "Not Completed"
-        if pd.isna(row["due"]) or row["done"] <= row["due"]:
-            return "On Time"
-        return "Late"
-    df["cls"] = df.apply(classify, axis=1)
-    agg = df.groupby("cls").size().reset_index(name="Count")
+    due = parse_dates(tasks_df["due_date"])
+    done = parse_dates(tasks_df["completed_date"])
+    finished = (tasks_df["status"] == "Completed") & done.notna()
+    cls = np.where(~finished, "Not Completed", np.where(due.isna() | (done <= due), "On Time", "Late"))
+    agg = pd.Series(cls).value_counts().sort_index().rename_axis("cls").reset_index(name="Count")
     return px.pie(agg, names="cls", values="Count", title="On-time Completion")
 
 def overdue_trend(tasks_df: pd.DataFrame):
     if tasks_df.empty:
         return px.line(pd.DataFrame({"Date": [], "Overdue": []}), x="Date", y="Overdue", title="Overdue Trendline")
     df = tasks_df.copy()
-    df["due"] = pd.to_datetime(df["due_date"], errors="coerce")
-    today = pd.Timestamp.today().normalize()
-    df["overdue"] = ((df["status"] != "Completed") & (df["due"].notna()) & (df["due"] < today)).astype(int)
+    df["due"] = parse_dates(df["due_date"])
+    df["overdue"] = overdue_mask(df).astype(int)
     agg = df.groupby(df["due"].dt.date)["overdue"].sum().reset_index(name="Overdue")
     agg.rename(columns={"due":"Date"}, inplace=True)
     return px.line(agg, x="Date", y="Overdue", markers=True, title="Overdue Trendline")
+
+def overdue_aging(tasks_df: pd.DataFrame):
+    buckets = summarize(tasks_df)["buckets"] if not tasks_df.empty else pd.Series(0, index=AGING_BUCKETS)
+    agg = buckets.rename_axis("Days Overdue").reset_index(name="Tasks")
+    return px.bar(agg, x="Days Overdue", y="Tasks", text="Tasks", title="Overdue Aging")
+
+def owner_workload(stats_df: pd.DataFrame, top=15):
+    if stats_df.empty:
+        return px.bar(pd.DataFrame({"Owner": [], "Tasks": []}), x="Owner", y="Tasks", title="Owner Workload")
+    top_df = stats_df.head(top).melt(id_vars="Owner", value_vars=["Open", "Overdue"], var_name="Load", value_name="Tasks")
+    return px.bar(top_df, x="Owner", y="Tasks", color="Load", barmode="group", title="Owner Workload (Open vs Overdue)")
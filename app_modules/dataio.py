@@ -0,0 +1,293 @@
+import hashlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from . import db, geo
+from .utils import df_from_records, parse_dates
+
+IMPORT_COLUMNS = {
+    "industries": ["name"],
+    "clients": ["name","industry_id","region_id","contact_person","contact_email","contact_phone","notes","is_active","latitude","longitude"],
+    "tasks": ["title","client_id","owner","priority","status","start_date","due_date","completed_date","description"],
+    "regions": ["name","country","latitude","longitude","weight","color","notes"],
+}
+EXPORT_TABLES = ["clients", "tasks", "regions", "industries"]
+IMPORT_ORDER = ["industries", "regions", "clients", "tasks"]
+NATURAL_KEYS = {"industries": "name", "regions": "name", "clients": "name"}
+# FK column -> (parent table, column holding the parent's natural key instead of its id)
+FOREIGN_KEYS = {
+    "clients": {"industry_id": ("industries", "industry"), "region_id": ("regions", "region")},
+    "tasks": {"client_id": ("clients", "client")},
+}
+# Columns identifying a row across imports. Upserts match on a JSON array of
+# these values, which SQLite's json_array() reproduces for rows added elsewhere.
+# These values can change (a moved due date), so rows carrying a stable id from
+# their source system (first of SOURCE_KEY_COLUMNS present) match on that instead.
+UPSERT_KEYS = {
+    "clients": ["name"],
+    "regions": ["name"],
+    "tasks": ["client_id", "title", "due_date"],
+}
+SOURCE_KEY_COLUMNS = ["external_id", "source_key"]
+TRIMMED_COLUMNS = {"name", "title"}
+DATE_COLUMNS = ["start_date", "due_date", "completed_date"]
+IMPORT_MODES = ["upsert", "append"]
+PARSE_WORKERS = int(os.environ.get("INTERTEK_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_pool = None
+
+def _noop(fraction, message=None):
+    pass
+
+def export_frames(progress=_noop):
+    frames = {}
+    for i, table in enumerate(EXPORT_TABLES):
+        progress(i / len(EXPORT_TABLES), f"Reading {table}")
+        frames[table] = df_from_records(db.list_table(table))
+    return frames
+
+def export_csv_zip(progress=_noop):
+    frames = export_frames(progress)
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as z:
+        for table, df in frames.items():
+            z.writestr(f"{table}.csv", df.to_csv(index=False).encode("utf-8"))
+    return out.getvalue()
+
+def export_excel(progress=_noop):
+    frames = export_frames(progress)
+    out = io.BytesIO()
+    with pd.ExcelWriter(out, engine="xlsxwriter") as writer:
+        for table, df in frames.items():
+            df.to_excel(writer, sheet_name=table, index=False)
+    return out.getvalue()
+
+def _parse(kind, data, sheet=None):
+    if kind == "csv":
+        return pd.read_csv(io.BytesIO(data))
+    return pd.read_excel(io.BytesIO(data), sheet_name=sheet)
+
+def _parse_pool():
+    global _pool
+    if _pool is None:
+        # Forking the server process would copy its threads' locks (the DB
+        # writer, job pool and report scheduler) into the workers mid-use.
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context(method))
+    return _pool
+
+def parse_sources(sources, progress=_noop):
+    """Parse {table: (kind, data, sheet)} sources, in parallel when there is more than one."""
+    if len(sources) <= 1:
+        return {table: _parse(*src) for table, src in sources.items()}
+    futures = {_parse_pool().submit(_parse, *src): table for table, src in sources.items()}
+    frames = {}
+    try:
+        for fut in as_completed(futures):
+            frames[futures[fut]] = fut.result()
+            progress(0.5 * len(frames) / len(futures), f"Parsed {futures[fut]}")
+    finally:
+        for fut in futures:
+            fut.cancel()
+    return frames
+
+def csv_sources(files):
+    """Map uploaded (filename, bytes) pairs to parse sources; unknown files are ignored."""
+    sources = {}
+    for name, data in files:
+        table = name.lower().removesuffix(".csv")
+        if table in IMPORT_COLUMNS:
+            sources[table] = ("csv", data, None)
+    return sources
+
+def excel_sources(data):
+    sheets = pd.ExcelFile(io.BytesIO(data)).sheet_names
+    return {s.lower(): ("excel", data, s) for s in sheets if s.lower() in IMPORT_COLUMNS}
+
+def _iso_dates(values):
+    parsed = parse_dates(values)
+    return parsed.dt.strftime("%Y-%m-%d").astype(object).where(parsed.notna(), None)
+
+def _clean(df):
+    df = df.rename(columns=lambda c: str(c).strip().lower())
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = _iso_dates(df[col])
+    return df.astype(object).where(df.notna(), None)
+
+def _json(values):
+    return json.dumps(values, ensure_ascii=False, separators=(",", ":"), default=str)
+
+def _key_value(v):
+    """A key component as json_array() would render it: NaN as null, whole floats as ints."""
+    if isinstance(v, float):
+        if math.isnan(v):
+            return None
+        if v.is_integer():
+            return int(v)
+    return v
+
+def _key_expr(table):
+    return ", ".join(f"trim({c})" if c in TRIMMED_COLUMNS else c for c in UPSERT_KEYS[table])
+
+def _adopt_existing_rows(conn, table):
+    """Give rows created outside upsert imports (UI, append mode) their natural key.
+
+    Where several rows share a key only the first is adopted; the rest keep a
+    NULL key and are left alone by upserts.
+    """
+    conn.execute(f"UPDATE OR IGNORE {table} SET natural_key = json_array({_key_expr(table)}) WHERE natural_key IS NULL")
+
+def _as_id(v):
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return None
+
+def _resolve_foreign_keys(conn, table, df, source_keys):
+    """Rewrite FK columns of `df` to ids in this database; returns the count left unresolved.
+
+    A parent may be referenced by name (e.g. a `client` column) or by id. Ids
+    that belong to a parent file in the same import are translated through
+    that file's natural key, so exports from another database re-import cleanly.
+    """
+    unresolved = 0
+    for col, (parent, name_col) in FOREIGN_KEYS.get(table, {}).items():
+        key = NATURAL_KEYS[parent]
+        by_key = {r[0]: r[1] for r in conn.execute(f"SELECT {key}, MIN(id) FROM {parent} GROUP BY {key}")}
+        if name_col in df.columns:
+            given = df[name_col]
+            values = [by_key.get(str(v).strip()) if v is not None else None for v in given]
+        elif col in df.columns:
+            given = df[col]
+            src = source_keys.get(parent)
+            if src is not None:
+                values = [by_key.get(src.get(_as_id(v))) for v in given]
+            else:
+                ids = set(by_key.values())
+                values = [_as_id(v) if _as_id(v) in ids else None for v in given]
+        else:
+            continue
+        unresolved += sum(1 for v, r in zip(given, values) if v is not None and r is None)
+        # Object dtype keeps ids as ints beside None; a float column would key them as 1.0/NaN.
+        df[col] = pd.Series(values, index=df.index, dtype=object)
+    return unresolved
+
+def _locate_client_regions(conn, df):
+    """Fill a missing region_id from the client's site coordinates."""
+    if "latitude" not in df.columns or "longitude" not in df.columns:
+        return
+    if "region_id" not in df.columns:
+        df["region_id"] = None
+    todo = df["region_id"].isna() & df["latitude"].notna() & df["longitude"].notna()
+    if todo.any():
+        regions = [dict(r) for r in conn.execute("SELECT id, name, latitude, longitude FROM regions")]
+        located = geo.locate_region_ids(df.loc[todo, "latitude"].astype(float), df.loc[todo, "longitude"].astype(float), regions)
+        df.loc[todo, "region_id"] = pd.Series(located, index=df.index[todo], dtype=object)
+
+def _source_key(v):
+    if v is None:
+        return None
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    return str(v).strip() or None
+
+def _source_keys(df):
+    col = next((c for c in SOURCE_KEY_COLUMNS if c in df.columns), None)
+    if col is None:
+        return [None] * len(df)
+    return [_source_key(v) for v in df[col]]
+
+def _write_rows(conn, table, df, mode, ts):
+    cols = [c for c in IMPORT_COLUMNS[table] if c in df.columns]
+    rows = [tuple(r) for r in df[cols].itertuples(index=False)]
+    stamp_cols = [] if table in db.UNTIMESTAMPED_TABLES else ["created_at", "updated_at"]
+    stamps = (ts,) * len(stamp_cols)
+    before = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    if mode == "upsert" and table in UPSERT_KEYS:
+        _adopt_existing_rows(conn, table)
+        key_pos = [cols.index(c) if c in cols else None for c in UPSERT_KEYS[table]]
+        keyed = [
+            r + (_json([_key_value(r[i]) if i is not None else None for i in key_pos]),
+                 hashlib.sha1(_json(r).encode("utf-8")).hexdigest()) + stamps
+            for r in rows
+        ]
+        sources = _source_keys(df)
+        by_key = [r for r, s in zip(keyed, sources) if s is None]
+        by_source = [r + (s,) for r, s in zip(keyed, sources) if s is not None]
+        all_cols = cols + ["natural_key", "row_hash"] + stamp_cols
+        values = ",".join(["?"] * len(all_cols))
+        assignments = ", ".join(f"{c}=excluded.{c}" for c in cols + ["row_hash"] + stamp_cols[1:])
+        written = 0
+        if by_key:
+            written += conn.executemany(
+                f"INSERT OR IGNORE INTO {table} ({','.join(all_cols)}) VALUES ({values}) "
+                f"ON CONFLICT(natural_key) DO UPDATE SET {assignments} "
+                f"WHERE {table}.row_hash IS NOT excluded.row_hash", by_key).rowcount
+        if by_source:
+            # First sync with source ids: link rows that so far matched on natural key.
+            conn.executemany(f"UPDATE OR IGNORE {table} SET source_key=? WHERE natural_key=? AND source_key IS NULL",
+                             [(r[-1], r[len(cols)]) for r in by_source])
+            # Keep natural_key current unless the new value belongs to another row.
+            written += conn.executemany(
+                f"INSERT OR IGNORE INTO {table} ({','.join(all_cols)},source_key) VALUES ({values},?) "
+                f"ON CONFLICT(source_key) DO UPDATE SET {assignments}, natural_key=CASE WHEN EXISTS "
+                f"(SELECT 1 FROM {table} o WHERE o.natural_key = excluded.natural_key AND o.id != {table}.id) "
+                f"THEN {table}.natural_key ELSE excluded.natural_key END "
+                f"WHERE {table}.row_hash IS NOT excluded.row_hash", by_source).rowcount
+    else:
+        rows = [r + stamps for r in rows]
+        all_cols = cols + stamp_cols
+        sql = f"INSERT OR IGNORE INTO {table} ({','.join(all_cols)}) VALUES ({','.join(['?']*len(all_cols))})"
+        written = conn.executemany(sql, rows).rowcount
+    inserted = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] - before
+    return {"rows": len(rows), "inserted": inserted, "updated": written - inserted, "unchanged": len(rows) - written}
+
+def import_frames(frames, mode="upsert", progress=_noop):
+    """Write parsed frames in dependency order inside one transaction.
+
+    "append" inserts every row. "upsert" matches rows on their source key
+    (SOURCE_KEY_COLUMNS) when they carry one and on UPSERT_KEYS otherwise, updates
+    those whose content hash changed and skips the rest without writing.
+    Rows that violate NOT NULL/UNIQUE constraints are skipped in both modes.
+    Returns {table: {"rows", "inserted", "updated", "unchanged", "unresolved"}}.
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode: {mode}")
+    ts = db.now_iso()
+    tables = [t for t in IMPORT_ORDER if t in frames]
+    total = sum(len(frames[t]) for t in tables) or 1
+    done = 0
+    summary = {}
+    source_keys = {}
+    with db.transaction() as conn:
+        for table in tables:
+            progress(0.5 + 0.5 * done / total, f"Writing {table}")
+            df = _clean(frames[table])
+            for col in TRIMMED_COLUMNS & set(df.columns):
+                df[col] = [str(v).strip() if v is not None else None for v in df[col]]
+            key = NATURAL_KEYS.get(table)
+            if key and "id" in df.columns and key in df.columns:
+                source_keys[table] = {_as_id(i): k for i, k in zip(df["id"], df[key])}
+            unresolved = _resolve_foreign_keys(conn, table, df, source_keys)
+            if table == "clients":
+                _locate_client_regions(conn, df)
+            summary[table] = dict(_write_rows(conn, table, df, mode, ts), unresolved=unresolved)
+            done += len(df)
+    progress(1.0, "Import complete")
+    return summary
+
+def import_csv_files(files, mode="upsert", progress=_noop):
+    return import_frames(parse_sources(csv_sources(files), progress), mode, progress)
+
+def import_excel(data, mode="upsert", progress=_noop):
+    return import_frames(parse_sources(excel_sources(data), progress), mode, progress)
+
+def reset_database(progress=_noop):
+    progress(0.0, "Deleting all data")
+    db.reset_data()
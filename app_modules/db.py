@@ -1,17 +1,132 @@
+import atexit
 import os
+import queue
 import sqlite3
-from contextlib import closing
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import closing, contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
 
 DB_PATH = os.environ.get("INTERTEK_DB_PATH", os.path.join(os.path.dirname(__file__), "..", "data", "intertek.db"))
 DB_PATH = os.path.abspath(DB_PATH)
 
+# Bump whenever SCHEMA, ADDED_COLUMNS or POST_MIGRATION_SQL change; init_db
+# skips databases already stamped with this version (PRAGMA user_version).
+SCHEMA_VERSION = 9
+
+# Writes go through one serialized connection; reads use a pool of read-only
+# connections. In WAL mode readers never wait for the writer. Set
+# INTERTEK_DB_WAL=0 to keep the rollback journal (readers then open plain
+# connections per call).
+USE_WAL = os.environ.get("INTERTEK_DB_WAL", "1") != "0"
+READ_POOL_SIZE = int(os.environ.get("INTERTEK_READ_POOL", "8"))
+BUSY_TIMEOUT_S = 30
+# Every CHECKPOINT_CHECK_EVERY write transactions, truncate the WAL if it has
+# grown past WAL_TRUNCATE_BYTES (SQLite's own auto-checkpoint never shrinks it).
+CHECKPOINT_CHECK_EVERY = 200
+WAL_TRUNCATE_BYTES = 64 * 1024 * 1024
+# change_log keeps CHANGE_LOG_RETENTION_DAYS of history (and at most
+# CHANGE_LOG_MAX_ROWS rows) for fetch_delta; each table's newest row is always
+# kept for table_versions. Retention runs every CHECKPOINT_CHECK_EVERY write
+# transactions and whenever CHANGE_LOG_COMPACT_ROWS rows were written since.
+CHANGE_LOG_RETENTION_DAYS = float(os.environ.get("INTERTEK_CHANGE_LOG_DAYS", "7"))
+CHANGE_LOG_MAX_ROWS = 500_000
+CHANGE_LOG_COMPACT_ROWS = 50_000
+
+_init_lock = threading.Lock()
+_initialized = set()
+_writer_lock = threading.RLock()
+_writer = None
+_writer_depth = 0
+_writes = 0
+_compacted_at = 0
+_read_pool = queue.LifoQueue(maxsize=READ_POOL_SIZE)
+
 def get_conn():
-    conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+    conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+                           timeout=BUSY_TIMEOUT_S)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON;")
     return conn
 
+def _open_reader():
+    conn = sqlite3.connect(f"{Path(DB_PATH).as_uri()}?mode=ro", uri=True, check_same_thread=False,
+                           detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES, timeout=BUSY_TIMEOUT_S)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+@contextmanager
+def reader():
+    """Borrow a read-only connection."""
+    if not USE_WAL:
+        with closing(get_conn()) as conn:
+            yield conn
+        return
+    try:
+        conn = _read_pool.get_nowait()
+    except queue.Empty:
+        conn = _open_reader()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            _read_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+def _get_writer():
+    global _writer
+    if _writer is None:
+        conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+                               timeout=BUSY_TIMEOUT_S, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        if USE_WAL:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        _writer = conn
+    return _writer
+
+def checkpoint(mode="PASSIVE"):
+    """Run a WAL checkpoint; returns (busy, wal_frames, checkpointed_frames)."""
+    with _writer_lock:
+        return tuple(_get_writer().execute(f"PRAGMA wal_checkpoint({mode})").fetchone())
+
+def _compact_change_log(conn, retention_days, max_rows):
+    """Drop change_log history older than the retention window; returns the new watermark."""
+    floor = conn.execute("SELECT compacted_through FROM change_log_state").fetchone()[0]
+    latest = conn.execute("SELECT COALESCE(MAX(version), 0) FROM change_log").fetchone()[0]
+    cutoff = (datetime.utcnow() - timedelta(days=retention_days)).isoformat(timespec="milliseconds")
+    # Versions grow with changed_at, so the first row inside the window bounds the expired ones.
+    first_kept = conn.execute("SELECT version FROM change_log WHERE changed_at >= ? ORDER BY version LIMIT 1",
+                              (cutoff,)).fetchone()
+    through = max((first_kept[0] if first_kept else latest + 1) - 1, latest - max_rows)
+    if through <= floor:
+        return floor
+    conn.execute("DELETE FROM change_log WHERE version <= ? AND version NOT IN "
+                 "(SELECT MAX(version) FROM change_log GROUP BY table_name)", (through,))
+    conn.execute("UPDATE change_log_state SET compacted_through = ?", (through,))
+    return through
+
+def _after_commit(conn):
+    global _writes, _compacted_at
+    _writes += 1
+    tick = _writes % CHECKPOINT_CHECK_EVERY == 0
+    if tick or conn.total_changes - _compacted_at > CHANGE_LOG_COMPACT_ROWS:
+        _compact_change_log(conn, CHANGE_LOG_RETENTION_DAYS, CHANGE_LOG_MAX_ROWS)
+        conn.commit()
+        _compacted_at = conn.total_changes
+    if not USE_WAL or not tick:
+        return
+    wal = DB_PATH + "-wal"
+    if os.path.exists(wal) and os.path.getsize(wal) > WAL_TRUNCATE_BYTES:
+        checkpoint("TRUNCATE")
+
 SCHEMA = """
 PRAGMA foreign_keys = ON;
 
@@ -64,8 +179,187 @@ CREATE TABLE IF NOT EXISTS tasks (
     updated_at TEXT NOT NULL,
     FOREIGN KEY (client_id) REFERENCES clients(id) ON UPDATE CASCADE ON DELETE SET NULL
 );
+
+CREATE TABLE IF NOT EXISTS change_log (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    op TEXT NOT NULL,
+    changed_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_change_log_table ON change_log(table_name, version);
+
+-- Highest version whose history may have been compacted away; fetch_delta
+-- answers older `since` values with a full load.
+CREATE TABLE IF NOT EXISTS change_log_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    compacted_through INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'Queued',
+    progress REAL DEFAULT 0,
+    message TEXT,
+    result_path TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+TRACKED_TABLES = ["industries", "clients", "regions", "tasks"]
+UNTIMESTAMPED_TABLES = {"industries"}
+
+def _change_triggers(table):
+    ts = "strftime('%Y-%m-%dT%H:%M:%f', 'now')"
+    return "".join(
+        f"""
+CREATE TRIGGER IF NOT EXISTS trg_{table}_{op.lower()} AFTER {event} ON {table}
+BEGIN
+    INSERT INTO change_log(table_name, row_id, op, changed_at) VALUES ('{table}', {ref}.id, '{op}', {ts});
+END;
+"""
+        for op, event, ref in [("I", "INSERT", "NEW"), ("U", "UPDATE", "NEW"), ("D", "DELETE", "OLD")]
+    )
+
+SCHEMA += "".join(_change_triggers(t) for t in TRACKED_TABLES)
+
+# Client 360: one row per client, kept current by the triggers below so the
+# Clients page never aggregates tasks. Counts are adjusted per written row;
+# only removing a client's earliest open due date looks anything up (via
+# idx_tasks_client_open_due). Overdue is read at query time as next_due < today.
+_OPEN = "COALESCE({r}.status, '') != 'Completed'"
+_DONE = "COALESCE({r}.status, '') = 'Completed'"
+_ON_TIME = ("COALESCE({r}.status = 'Completed' AND date({r}.completed_date) IS NOT NULL "
+            "AND (date({r}.due_date) IS NULL OR date({r}.completed_date) <= date({r}.due_date)), 0)")
+_LATE = "COALESCE({r}.status = 'Completed' AND date({r}.completed_date) > date({r}.due_date), 0)"
+
+def _summary_add(r):
+    o, d = _OPEN.format(r=r), _DONE.format(r=r)
+    return f"""
+    INSERT INTO client_summary(client_id, open_tasks, completed_tasks, on_time_tasks, late_tasks, next_due_date, last_activity)
+    SELECT {r}.client_id, {o}, {d}, {_ON_TIME.format(r=r)}, {_LATE.format(r=r)},
+           CASE WHEN {o} THEN {r}.due_date END, {r}.updated_at
+    WHERE {r}.client_id IS NOT NULL
+    ON CONFLICT(client_id) DO UPDATE SET
+        open_tasks = open_tasks + excluded.open_tasks,
+        completed_tasks = completed_tasks + excluded.completed_tasks,
+        on_time_tasks = on_time_tasks + excluded.on_time_tasks,
+        late_tasks = late_tasks + excluded.late_tasks,
+        next_due_date = COALESCE(MIN(next_due_date, excluded.next_due_date), next_due_date, excluded.next_due_date),
+        last_activity = COALESCE(MAX(last_activity, excluded.last_activity), last_activity, excluded.last_activity);"""
+
+def _summary_remove(r):
+    o = _OPEN.format(r=r)
+    return f"""
+    UPDATE client_summary SET
+        open_tasks = open_tasks - ({o}),
+        completed_tasks = completed_tasks - ({_DONE.format(r=r)}),
+        on_time_tasks = on_time_tasks - {_ON_TIME.format(r=r)},
+        late_tasks = late_tasks - {_LATE.format(r=r)},
+        next_due_date = CASE WHEN {o} AND {r}.due_date = next_due_date THEN
+            (SELECT MIN(due_date) FROM tasks WHERE client_id = {r}.client_id AND COALESCE(status, '') != 'Completed')
+            ELSE next_due_date END
+    WHERE client_id = {r}.client_id;"""
+
+SCHEMA += f"""
+CREATE TABLE IF NOT EXISTS client_summary (
+    client_id INTEGER PRIMARY KEY,
+    open_tasks INTEGER NOT NULL DEFAULT 0,
+    completed_tasks INTEGER NOT NULL DEFAULT 0,
+    on_time_tasks INTEGER NOT NULL DEFAULT 0,
+    late_tasks INTEGER NOT NULL DEFAULT 0,
+    next_due_date TEXT,
+    last_activity TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_tasks_client_open_due ON tasks(client_id, due_date) WHERE COALESCE(status, '') != 'Completed';
+
+CREATE TRIGGER IF NOT EXISTS trg_clients_summary_i AFTER INSERT ON clients
+BEGIN
+    INSERT OR IGNORE INTO client_summary(client_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_clients_summary_d AFTER DELETE ON clients
+BEGIN
+    DELETE FROM client_summary WHERE client_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tasks_summary_i AFTER INSERT ON tasks
+BEGIN{_summary_add("NEW")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tasks_summary_u AFTER UPDATE ON tasks
+BEGIN{_summary_remove("OLD")}{_summary_add("NEW")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tasks_summary_d AFTER DELETE ON tasks
+BEGIN{_summary_remove("OLD")}
+END;
 """
 
+REBUILD_CLIENT_SUMMARY_SQL = f"""
+INSERT INTO client_summary(client_id, open_tasks, completed_tasks, on_time_tasks, late_tasks, next_due_date, last_activity)
+SELECT c.id,
+       COALESCE(SUM(t.id IS NOT NULL AND {_OPEN.format(r="t")}), 0),
+       COALESCE(SUM({_DONE.format(r="t")}), 0),
+       COALESCE(SUM({_ON_TIME.format(r="t")}), 0),
+       COALESCE(SUM({_LATE.format(r="t")}), 0),
+       MIN(CASE WHEN t.id IS NOT NULL AND {_OPEN.format(r="t")} THEN t.due_date END),
+       MAX(t.updated_at)
+FROM clients c LEFT JOIN tasks t ON t.client_id = c.id
+GROUP BY c.id
+"""
+
+# Columns added after the first release; init_db adds any that an older database lacks.
+ADDED_COLUMNS = {
+    "clients": [("natural_key", "TEXT"), ("row_hash", "TEXT"), ("latitude", "REAL"), ("longitude", "REAL"),
+                ("source_key", "TEXT")],
+    "regions": [("natural_key", "TEXT"), ("row_hash", "TEXT"), ("source_key", "TEXT")],
+    "tasks": [("natural_key", "TEXT"), ("row_hash", "TEXT"), ("source_key", "TEXT")],
+}
+
+POST_MIGRATION_SQL = """
+CREATE UNIQUE INDEX IF NOT EXISTS ux_clients_natural_key ON clients(natural_key);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_regions_natural_key ON regions(natural_key);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_tasks_natural_key ON tasks(natural_key);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_clients_source_key ON clients(source_key);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_regions_source_key ON regions(source_key);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_tasks_source_key ON tasks(source_key);
+CREATE INDEX IF NOT EXISTS idx_tasks_open_due ON tasks(due_date) WHERE COALESCE(status, '') != 'Completed';
+"""
+
+def _migrate(conn):
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+        for name, decl in columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+    conn.executescript(POST_MIGRATION_SQL)
+
+TASK_DATE_COLUMNS = ["start_date", "due_date", "completed_date"]
+_ISO_DATE_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*"
+
+def _normalize_task_dates(conn):
+    """Rewrite task dates stored in other formats (01/02/2024, Jan 3 2024) as ISO.
+
+    SQL date filters only understand ISO dates, while pandas parses the rest
+    too; values neither can parse are left untouched.
+    """
+    import pandas as pd
+    from .utils import parse_dates
+    for col in TASK_DATE_COLUMNS:
+        rows = conn.execute(f"SELECT id, {col} FROM tasks WHERE {col} NOT GLOB ? AND TRIM({col}) != ''",
+                            (_ISO_DATE_GLOB,)).fetchall()
+        if not rows:
+            continue
+        parsed = parse_dates(pd.Series([r[1] for r in rows], dtype=object))
+        conn.executemany(f"UPDATE tasks SET {col} = ? WHERE id = ?",
+                         [(d.strftime("%Y-%m-%d"), r[0]) for r, d, ok in zip(rows, parsed, parsed.notna()) if ok])
+
 DEFAULT_INDUSTRIES = [
     "Oil & Gas / Petroleum Refining & Storage",
     "Power Generation",
@@ -84,42 +378,335 @@ DEFAULT_INDUSTRIES = [
 ]
 
 def init_db():
-    with closing(get_conn()) as conn:
-        conn.executescript(SCHEMA)
-        cur = conn.execute("SELECT COUNT(*) as c FROM industries")
-        if cur.fetchone()["c"] == 0:
-            conn.executemany("INSERT INTO industries(name) VALUES (?)", [(x,) for x in DEFAULT_INDUSTRIES])
-        conn.commit()
+    """Create or migrate the schema; runs at most once per process and database."""
+    key = (DB_PATH, SCHEMA_VERSION)
+    if key in _initialized:
+        return
+    with _init_lock:
+        if key in _initialized:
+            return
+        with transaction() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.executescript(SCHEMA)
+                _migrate(conn)
+                _normalize_task_dates(conn)
+                _rebuild_client_summary(conn)
+                # Older releases compacted change_log down to one row per table.
+                conn.execute("INSERT OR IGNORE INTO change_log_state(id, compacted_through) "
+                             "SELECT 1, COALESCE(MAX(version), 0) FROM change_log")
+                cur = conn.execute("SELECT COUNT(*) as c FROM industries")
+                if cur.fetchone()["c"] == 0:
+                    conn.executemany("INSERT INTO industries(name) VALUES (?)", [(x,) for x in DEFAULT_INDUSTRIES])
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        _initialized.add(key)
+
+@contextmanager
+def transaction():
+    """Write transaction on the shared writer connection, one at a time.
+
+    Nested calls on the same thread join the outer transaction, which alone
+    commits or rolls back. The outer call opens it explicitly so savepoints
+    taken inside nest in it; otherwise a RELEASE would commit on its own.
+    """
+    global _writer_depth
+    with _writer_lock:
+        conn = _get_writer()
+        _writer_depth += 1
+        try:
+            if _writer_depth == 1 and not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            if _writer_depth == 1:
+                conn.commit()
+        except BaseException:
+            if _writer_depth == 1:
+                conn.rollback()
+            raise
+        finally:
+            _writer_depth -= 1
+        if _writer_depth == 0:
+            _after_commit(conn)
+
+# Children before parents: clients.region_id has no ON DELETE action.
+RESET_ORDER = ["tasks", "clients", "regions", "industries"]
+
+def reset_data():
+    with transaction() as conn:
+        for table in RESET_ORDER:
+            conn.execute(f"DELETE FROM {table}")
+        conn.executemany("INSERT INTO industries(name) VALUES (?)", [(x,) for x in DEFAULT_INDUSTRIES])
 
 def now_iso():
     return datetime.utcnow().isoformat()
 
 def list_table(table, where="", params=()):
-    with closing(get_conn()) as conn:
+    with reader() as conn:
         cur = conn.execute(f"SELECT * FROM {table} {where}", params)
         return [dict(row) for row in cur.fetchall()]
 
-def insert(table, data: dict):
+def _insert(conn, table, data):
     ts = now_iso()
     data = dict(data)
-    data.setdefault("created_at", ts)
-    data.setdefault("updated_at", ts)
+    if table not in UNTIMESTAMPED_TABLES:
+        data.setdefault("created_at", ts)
+        data.setdefault("updated_at", ts)
     keys = ",".join(data.keys())
     placeholders = ",".join(["?"]*len(data))
-    with closing(get_conn()) as conn:
-        cur = conn.execute(f"INSERT INTO {table} ({keys}) VALUES ({placeholders})", tuple(data.values()))
-        conn.commit()
-        return cur.lastrowid
+    cur = conn.execute(f"INSERT INTO {table} ({keys}) VALUES ({placeholders})", tuple(data.values()))
+    return cur.lastrowid
 
-def update(table, id_, data: dict):
+def _update(conn, table, id_, data):
     data = dict(data)
-    data["updated_at"] = now_iso()
+    if table not in UNTIMESTAMPED_TABLES:
+        data["updated_at"] = now_iso()
     assignments = ",".join([f"{k}=?" for k in data.keys()])
-    with closing(get_conn()) as conn:
-        conn.execute(f"UPDATE {table} SET {assignments} WHERE id=?", tuple(data.values()) + (id_,))
-        conn.commit()
+    conn.execute(f"UPDATE {table} SET {assignments} WHERE id=?", tuple(data.values()) + (id_,))
+
+def _delete(conn, table, id_):
+    conn.execute(f"DELETE FROM {table} WHERE id=?", (id_,))
+
+def insert(table, data: dict):
+    with transaction() as conn:
+        return _insert(conn, table, data)
+
+def update(table, id_, data: dict):
+    with transaction() as conn:
+        _update(conn, table, id_, data)
 
 def delete(table, id_):
-    with closing(get_conn()) as conn:
-        conn.execute(f"DELETE FROM {table} WHERE id=?", (id_,))
-        conn.commit()
+    with transaction() as conn:
+        _delete(conn, table, id_)
+
+# Write-behind queue: UI edits from every session are grouped into one
+# transaction per flush instead of one commit each.
+WRITE_FLUSH_INTERVAL_S = float(os.environ.get("INTERTEK_WRITE_FLUSH_MS", "20")) / 1000
+WRITE_MAX_BATCH = int(os.environ.get("INTERTEK_WRITE_BATCH", "256"))
+
+_OPS = {"insert": _insert, "update": _update, "delete": _delete, "barrier": lambda conn: None}
+
+class WriteQueue:
+    """Coalesces writes into periodic transactions on the writer connection.
+
+    Each submitted write returns a Future that resolves (to the new row id for
+    inserts) once the batch containing it has committed. Writes run inside
+    their own savepoint, so one failing write fails only its own Future; if
+    the batch itself cannot commit, every Future in it fails.
+
+    Committed is not the same as on disk: the writer runs WAL with
+    synchronous=NORMAL, so a resolved write survives an application crash but
+    the last few batches may be lost on power failure or an OS crash.
+    """
+
+    def __init__(self, flush_interval=WRITE_FLUSH_INTERVAL_S, max_batch=WRITE_MAX_BATCH):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._stats = {"flushes": 0, "writes": 0, "failed": 0, "last_batch": 0, "max_batch_seen": 0,
+                       "last_flush_ms": 0.0, "max_flush_ms": 0.0, "total_flush_ms": 0.0}
+        self._thread = threading.Thread(target=self._loop, name="intertek-write-queue", daemon=True)
+        self._thread.start()
+
+    def submit(self, op, *args):
+        fut = Future()
+        self._queue.put((_OPS[op], args, fut))
+        return fut
+
+    def insert(self, table, data: dict):
+        return self.submit("insert", table, data)
+
+    def update(self, table, id_, data: dict):
+        return self.submit("update", table, id_, data)
+
+    def delete(self, table, id_):
+        return self.submit("delete", table, id_)
+
+    def stats(self):
+        with self._stats_lock:
+            out = dict(self._stats)
+        out["depth"] = self._queue.qsize()
+        out["avg_flush_ms"] = out["total_flush_ms"] / out["flushes"] if out["flushes"] else 0.0
+        return out
+
+    def flush(self, timeout=None):
+        """Block until everything submitted so far has committed."""
+        self.submit("barrier").result(timeout)
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+        results = []
+        try:
+            with transaction() as conn:
+                for fn, args, fut in batch:
+                    conn.execute("SAVEPOINT queued_write")
+                    try:
+                        results.append((fut, fn(conn, *args), None))
+                        conn.execute("RELEASE queued_write")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO queued_write")
+                        conn.execute("RELEASE queued_write")
+                        results.append((fut, None, e))
+        except Exception as e:
+            results = [(fut, None, e) for _, _, fut in batch]
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            agg = self._stats
+            agg["flushes"] += 1
+            agg["writes"] += len(batch)
+            agg["failed"] += sum(1 for _, _, e in results if e is not None)
+            agg["last_batch"] = len(batch)
+            agg["max_batch_seen"] = max(agg["max_batch_seen"], len(batch))
+            agg["last_flush_ms"] = elapsed
+            agg["max_flush_ms"] = max(agg["max_flush_ms"], elapsed)
+            agg["total_flush_ms"] += elapsed
+        for fut, result, error in results:
+            if error is not None:
+                fut.set_exception(error)
+            else:
+                fut.set_result(result)
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+def write_queue():
+    global _write_queue
+    with _write_queue_lock:
+        if _write_queue is None:
+            _write_queue = WriteQueue()
+            atexit.register(_write_queue.flush, 5)
+        return _write_queue
+
+def queued_insert(table, data: dict):
+    return write_queue().insert(table, data)
+
+def queued_update(table, id_, data: dict):
+    return write_queue().update(table, id_, data)
+
+def queued_delete(table, id_):
+    return write_queue().delete(table, id_)
+
+def current_version(table=None):
+    with reader() as conn:
+        if table:
+            cur = conn.execute("SELECT COALESCE(MAX(version), 0) FROM change_log WHERE table_name=?", (table,))
+        else:
+            cur = conn.execute("SELECT COALESCE(MAX(version), 0) FROM change_log")
+        return cur.fetchone()[0]
+
+def changes_since(version, table=None):
+    where, params = "WHERE version > ?", (version,)
+    if table:
+        where, params = where + " AND table_name = ?", params + (table,)
+    return list_table("change_log", where + " ORDER BY version", params)
+
+def fetch_delta(table, since=0):
+    """Rows of `table` changed after version `since`.
+
+    Returns {"version", "full", "upserts", "deleted"}: the current state of
+    every row inserted or updated since then, and the ids of rows that no
+    longer exist. Pass the returned version as `since` on the next call.
+    `since=0` is a full load, and so is a `since` older than the retained
+    change_log history; "full" is then True and "upserts" is the whole table.
+    """
+    if table not in TRACKED_TABLES:
+        raise ValueError(f"Unknown table: {table}")
+    changed = "SELECT DISTINCT row_id FROM change_log WHERE table_name=? AND version > ?"
+    with reader() as conn:
+        conn.execute("BEGIN")
+        version = conn.execute("SELECT COALESCE(MAX(version), 0) FROM change_log").fetchone()[0]
+        floor = conn.execute("SELECT compacted_through FROM change_log_state").fetchone()[0]
+        full = since <= 0 or since < floor
+        if full:
+            upserts = conn.execute(f"SELECT * FROM {table}").fetchall()
+            deleted = []
+        else:
+            upserts = conn.execute(f"SELECT * FROM {table} WHERE id IN ({changed})", (table, since)).fetchall()
+            deleted = conn.execute(f"{changed} EXCEPT SELECT id FROM {table}", (table, since)).fetchall()
+        conn.rollback()
+    return {"version": version, "full": full, "upserts": [dict(r) for r in upserts],
+            "deleted": [r[0] for r in deleted]}
+
+def table_versions(tables):
+    with reader() as conn:
+        return tuple(
+            conn.execute("SELECT COALESCE(MAX(version), 0) FROM change_log WHERE table_name=?", (t,)).fetchone()[0]
+            for t in tables
+        )
+
+CLIENT_SUMMARY_SORTS = {
+    "name": "c.name COLLATE NOCASE",
+    "open_tasks": "s.open_tasks",
+    "completed_tasks": "s.completed_tasks",
+    "on_time_rate": "on_time_rate",
+    "next_due_date": "s.next_due_date",
+    "last_activity": "s.last_activity",
+}
+
+def client_summaries(sort="name", descending=False, limit=50, offset=0, search="", active_only=False, today=None):
+    """One page of client 360 rows, sorted and paged in SQL; returns (rows, total).
+
+    `sort` is a key of CLIENT_SUMMARY_SORTS. Empty sort values go last either way.
+    """
+    if sort not in CLIENT_SUMMARY_SORTS:
+        raise ValueError(f"Unknown sort: {sort}")
+    today = today or datetime.utcnow().date().isoformat()
+    where, params = ["1=1"], {"today": today, "limit": int(limit), "offset": int(offset)}
+    if search:
+        where.append("c.name LIKE :search")
+        params["search"] = f"%{search.strip()}%"
+    if active_only:
+        where.append("c.is_active = 1")
+    where = " AND ".join(where)
+    col = CLIENT_SUMMARY_SORTS[sort]
+    order = f"{col} IS NULL, {col} {'DESC' if descending else 'ASC'}, c.id"
+    sql = f"""
+        SELECT c.id, c.name, i.name AS industry, r.name AS region, c.is_active,
+               COALESCE(s.open_tasks, 0) AS open_tasks,
+               COALESCE(s.next_due_date < :today, 0) AS has_overdue,
+               s.next_due_date,
+               COALESCE(s.completed_tasks, 0) AS completed_tasks,
+               CAST(s.on_time_tasks AS REAL) / NULLIF(s.on_time_tasks + s.late_tasks, 0) AS on_time_rate,
+               s.last_activity
+        FROM clients c
+        LEFT JOIN client_summary s ON s.client_id = c.id
+        LEFT JOIN industries i ON i.id = c.industry_id
+        LEFT JOIN regions r ON r.id = c.region_id
+        WHERE {where}
+        ORDER BY {order}
+        LIMIT :limit OFFSET :offset
+    """
+    with reader() as conn:
+        conn.execute("BEGIN")
+        rows = conn.execute(sql, params).fetchall()
+        total = conn.execute(f"SELECT COUNT(*) FROM clients c WHERE {where}", params).fetchone()[0]
+        conn.rollback()
+    return [dict(r) for r in rows], total
+
+def _rebuild_client_summary(conn):
+    conn.execute("DELETE FROM client_summary")
+    conn.execute(REBUILD_CLIENT_SUMMARY_SQL)
+
+def rebuild_client_summary():
+    """Recompute client_summary from scratch (the triggers keep it current otherwise)."""
+    with transaction() as conn:
+        _rebuild_client_summary(conn)
+
+def compact_change_log(retention_days=None, max_rows=None):
+    """Apply change_log retention now; returns the version history is kept after."""
+    with transaction() as conn:
+        return _compact_change_log(conn, CHANGE_LOG_RETENTION_DAYS if retention_days is None else retention_days,
+                                   CHANGE_LOG_MAX_ROWS if max_rows is None else max_rows)
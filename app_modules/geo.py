@@ -1,23 +1,140 @@
+import json
+import os
+import threading
+import weakref
+from functools import lru_cache
+import numpy as np
 import pandas as pd
-import pydeck as pdk
+from . import db
 
-def heatmap_layer(df: pd.DataFrame, lat_col="latitude", lon_col="longitude", weight_col="weight", radius=60):
+# pydeck is imported inside the layer builders so that pages needing only the
+# spatial index or GeoJSON helpers don't pay for it at startup.
+
+GEOJSON_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "ghana_regions.geojson"))
+# Douglas-Peucker tolerance in degrees (~1 km) and decimals kept per coordinate (~10 m).
+DEFAULT_TOLERANCE = 0.01
+COORD_PRECISION = 4
+REGION_ZOOM = 6
+ICON_URL = "https://img.icons8.com/color/48/marker.png"
+REGION_TOOLTIP = {
+    "html": "<b>{region}</b><br/>👥 Clients: {clients}<br/>📋 Open: {open_tasks}<br/>✅ Completed: {completed_tasks}<br/>🔴 Critical: {critical_tasks}"
+}
+MAX_CACHED_DECKS = 8
+MAX_CACHED_BINS = 16
+# Target on-screen bin width for server-side aggregation.
+BIN_PIXELS = 24
+# Upper bound on point x edge comparisons evaluated at once by RegionIndex.
+PIP_CHUNK = 4_000_000
+
+_decks = {}
+_bins = {}
+_cache_lock = threading.Lock()
+
+def _remember(cache, key, value, limit):
+    """Store `value` in a small FIFO cache, evicting the oldest entry when full."""
+    with _cache_lock:
+        if key not in cache and len(cache) >= limit:
+            cache.pop(next(iter(cache)))
+        cache[key] = value
+    return value
+
+def bin_size_for_zoom(zoom, bin_pixels=BIN_PIXELS):
+    """Bin edge in degrees so one bin spans about `bin_pixels` screen pixels at `zoom`."""
+    return 360.0 / (256 * 2 ** zoom) * bin_pixels
+
+def _hex_cells(x, y, size):
+    # Pointy-top axial coordinates, rounded via cube coordinates.
+    q = (np.sqrt(3) / 3 * x - y / 3) / size
+    r = (2 / 3 * y) / size
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+def bin_points(df: pd.DataFrame, zoom, lat_col="latitude", lon_col="longitude", weight_col=None,
+               method="hex", cache_key=None):
+    """Aggregate points into hexagonal or square bins sized for `zoom`.
+
+    Returns one row per non-empty bin: the centroid of its points under
+    `lat_col`/`lon_col`, `count`, and the sum of `weight_col` when given, so
+    a bin weighs as much as the points it replaces.
+    With a `cache_key` (e.g. the data version the points came from) results
+    are reused until the key changes.
+    """
+    size = bin_size_for_zoom(zoom)
+    key = None if cache_key is None else (cache_key, method, round(size, 9), lat_col, lon_col, weight_col)
+    if key is not None:
+        with _cache_lock:
+            cached = _bins.get(key)
+        if cached is not None:
+            return cached
+    cols = [lat_col, lon_col] + ([weight_col] if weight_col else [])
+    pts = df[cols].dropna(subset=[lat_col, lon_col])
+    lat = pts[lat_col].to_numpy(dtype=float)
+    lon = pts[lon_col].to_numpy(dtype=float)
+    # Scale longitude so bins are roughly equal-area at this latitude.
+    scale = np.cos(np.radians(lat.mean())) if len(lat) else 1.0
+    x, y = lon * scale, lat
+    if method == "hex":
+        a, b = _hex_cells(x, y, size)
+    elif method == "grid":
+        a, b = np.floor(x / size).astype(np.int64), np.floor(y / size).astype(np.int64)
+    else:
+        raise ValueError(f"Unknown binning method: {method}")
+    if len(a):
+        a, b = a - a.min(), b - b.min()
+    cells, inverse = np.unique(a * (int(b.max(initial=0)) + 1) + b, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(cells))
+    out = pd.DataFrame({
+        lat_col: np.bincount(inverse, weights=lat, minlength=len(cells)) / np.maximum(counts, 1),
+        lon_col: np.bincount(inverse, weights=lon, minlength=len(cells)) / np.maximum(counts, 1),
+        "count": counts,
+    })
+    if weight_col:
+        w = pts[weight_col].to_numpy(dtype=float)
+        ok = ~np.isnan(w)
+        out[weight_col] = np.bincount(inverse[ok], weights=w[ok], minlength=len(cells))
+    if key is not None:
+        _remember(_bins, key, out, MAX_CACHED_BINS)
+    return out
+
+def heatmap_layer(df: pd.DataFrame, lat_col="latitude", lon_col="longitude", weight_col="weight", radius=60,
+                  zoom=None, cache_key=None):
+    """Heatmap of raw rows, or of server-side bins when `zoom` is given.
+
+    Bins carry the summed weight of their points and are aggregated with SUM,
+    so dense areas stay hotter than sparse ones after binning.
+    """
+    import pydeck as pdk
     if df.empty:
         return None
-    df2 = df[[lat_col, lon_col, weight_col]].copy()
+    if zoom is None:
+        df2 = df[[lat_col, lon_col, weight_col]].copy()
+        aggregation = "MEAN"
+    else:
+        df2 = bin_points(df, zoom, lat_col, lon_col, weight_col, cache_key=cache_key)
+        aggregation = "SUM"
     layer = pdk.Layer(
         "HeatmapLayer",
         data=df2,
         get_position=[lon_col, lat_col],
-        aggregation=pdk.types.String("MEAN"),
+        aggregation=pdk.types.String(aggregation),
         get_weight=weight_col,
         radiusPixels=radius,
     )
     return layer
 
-def scatter_layer(df: pd.DataFrame, lat_col="latitude", lon_col="longitude", radius=6):
+def scatter_layer(df: pd.DataFrame, lat_col="latitude", lon_col="longitude", radius=6, zoom=None, cache_key=None):
+    """Scatter of raw rows, or of bin centroids (with a `count`) when `zoom` is given."""
+    import pydeck as pdk
     if df.empty:
         return None
+    if zoom is not None:
+        df = bin_points(df, zoom, lat_col, lon_col, cache_key=cache_key)
     layer = pdk.Layer(
         "ScatterplotLayer",
         data=df,
@@ -29,6 +146,232 @@ def scatter_layer(df: pd.DataFrame, lat_col="latitude", lon_col="longitude", rad
     return layer
 
 def deck_view(df: pd.DataFrame, lat_col="latitude", lon_col="longitude"):
+    import pydeck as pdk
     if df.empty:
         return pdk.ViewState(latitude=0, longitude=0, zoom=1.5, pitch=0)
+    if "count" in df.columns:
+        # Binned frames: the count-weighted centroid equals the mean of the raw points.
+        w = df["count"].to_numpy(dtype=float)
+        lat = float(np.dot(df[lat_col].to_numpy(dtype=float), w) / w.sum())
+        lon = float(np.dot(df[lon_col].to_numpy(dtype=float), w) / w.sum())
+        return pdk.ViewState(latitude=lat, longitude=lon, zoom=2.2, pitch=30)
     return pdk.ViewState(latitude=float(df[lat_col].mean()), longitude=float(df[lon_col].mean()), zoom=2.2, pitch=30)
+
+def simplify_ring(coords, tolerance=DEFAULT_TOLERANCE):
+    """Douglas-Peucker simplification of one closed ring, never below a triangle."""
+    pts = np.asarray(coords, dtype=float)
+    if tolerance <= 0 or len(pts) <= 4:
+        return np.round(pts, COORD_PRECISION).tolist()
+    keep = np.zeros(len(pts), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(pts) - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j <= i + 1:
+            continue
+        a, b, seg = pts[i], pts[j], pts[i + 1:j]
+        d = b - a
+        norm = np.hypot(d[0], d[1])
+        if norm == 0:
+            dist = np.hypot(seg[:, 0] - a[0], seg[:, 1] - a[1])
+        else:
+            dist = np.abs(d[0] * (seg[:, 1] - a[1]) - d[1] * (seg[:, 0] - a[0])) / norm
+        k = int(np.argmax(dist))
+        if dist[k] > tolerance:
+            m = i + 1 + k
+            keep[m] = True
+            stack += [(i, m), (m, j)]
+    if keep.sum() < 4:
+        return np.round(pts, COORD_PRECISION).tolist()
+    return np.round(pts[keep], COORD_PRECISION).tolist()
+
+def _simplify_geometry(geom, tolerance):
+    if geom["type"] == "Polygon":
+        return {"type": "Polygon", "coordinates": [simplify_ring(r, tolerance) for r in geom["coordinates"]]}
+    if geom["type"] == "MultiPolygon":
+        return {"type": "MultiPolygon",
+                "coordinates": [[simplify_ring(r, tolerance) for r in poly] for poly in geom["coordinates"]]}
+    return geom
+
+@lru_cache(maxsize=4)
+def _load_geojson(path, mtime, tolerance):
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    features = [
+        {"type": "Feature", "properties": f["properties"], "geometry": _simplify_geometry(f["geometry"], tolerance)}
+        for f in raw["features"]
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+def region_geojson(tolerance=DEFAULT_TOLERANCE, path=GEOJSON_PATH):
+    """Simplified region polygons, parsed once per file version and tolerance. Treat as read-only."""
+    return _load_geojson(path, os.path.getmtime(path), tolerance)
+
+def region_names(path=GEOJSON_PATH):
+    return [f["properties"]["name"] for f in region_geojson(path=path)["features"]]
+
+@lru_cache(maxsize=4)
+def _boundary_layer(path, mtime, tolerance):
+    import pydeck as pdk
+    return pdk.Layer(
+        "GeoJsonLayer",
+        _load_geojson(path, mtime, tolerance),
+        opacity=0.2,
+        stroked=True,
+        filled=False,
+        extruded=False,
+        get_line_color=[80, 80, 80],
+    )
+
+@lru_cache(maxsize=None)
+def _serialized_deck_class():
+    import pydeck as pdk
+
+    class SerializedDeck(pdk.Deck):
+        # st.pydeck_chart calls to_json() on every render; serialize each deck once.
+        # Kept outside the instance because pydeck serializes instance attributes.
+        _json = weakref.WeakKeyDictionary()
+
+        def to_json(self):
+            if self not in self._json:
+                self._json[self] = super().to_json()
+            return self._json[self]
+
+    return SerializedDeck
+
+def region_deck(pins: pd.DataFrame, cache_key, sites=None, tolerance=DEFAULT_TOLERANCE, path=GEOJSON_PATH):
+    """Boundary + pin deck for the Regions page, cached under `cache_key`.
+
+    `cache_key` must change whenever `pins` would (e.g. the data versions of
+    the tables they were built from); the boundary layer is shared across keys.
+    `sites` (client coordinates) are drawn as a binned heatmap under the pins.
+    """
+    import pydeck as pdk
+    mtime = os.path.getmtime(path)
+    key = (cache_key, tolerance, path, mtime)
+    with _cache_lock:
+        deck = _decks.get(key)
+    if deck is None:
+        icon_layer = pdk.Layer(
+            "IconLayer",
+            data=pins.dropna(subset=["latitude", "longitude"]).to_dict("records"),
+            get_icon="icon_data",
+            get_size=4,
+            size_scale=10,
+            get_position=["longitude", "latitude"],
+            pickable=True,
+            icon_atlas=ICON_URL,
+            get_icon_color=[0, 100, 200],
+            get_icon_anchor="bottom",
+        )
+        layers = [_boundary_layer(path, mtime, tolerance)]
+        if sites is not None and not sites.empty:
+            sites = sites.assign(weight=1.0)
+            layers.append(heatmap_layer(sites, zoom=REGION_ZOOM, cache_key=cache_key))
+        layers.append(icon_layer)
+        deck = _remember(_decks, key, _serialized_deck_class()(
+            initial_view_state=pdk.ViewState(latitude=7.9, longitude=-1.0, zoom=REGION_ZOOM),
+            layers=layers,
+            tooltip=REGION_TOOLTIP,
+        ), MAX_CACHED_DECKS)
+    return deck
+
+class RegionIndex:
+    """Bounding-box index over region polygons with vectorized point-in-polygon tests.
+
+    Points are first matched against every feature's bounding box, then an
+    even-odd ray cast over the candidate feature's edges (holes and
+    multipolygons included) decides membership.
+    """
+
+    def __init__(self, geojson):
+        self.names = []
+        edges, owners = [], []
+        for i, feature in enumerate(geojson["features"]):
+            self.names.append(feature["properties"].get("name"))
+            geom = feature["geometry"]
+            polys = [geom["coordinates"]] if geom["type"] == "Polygon" else geom["coordinates"]
+            for ring in (np.asarray(r, dtype=float) for poly in polys for r in poly):
+                edges.append(np.hstack([ring[:-1], ring[1:]]))
+                owners.append(np.full(len(ring) - 1, i))
+        self.edges = np.vstack(edges) if edges else np.empty((0, 4))
+        self.owner = np.concatenate(owners) if owners else np.empty(0, dtype=int)
+        n = len(self.names)
+        self.bbox = np.full((n, 4), np.nan)
+        for i in range(n):
+            e = self.edges[self.owner == i]
+            if len(e):
+                self.bbox[i] = [e[:, [0, 2]].min(), e[:, [1, 3]].min(), e[:, [0, 2]].max(), e[:, [1, 3]].max()]
+
+    def locate(self, lats, lons):
+        """Feature index containing each point, or -1 when it lies outside every region."""
+        x = np.asarray(lons, dtype=float)
+        y = np.asarray(lats, dtype=float)
+        result = np.full(len(x), -1)
+        for i in range(len(self.names)):
+            minx, miny, maxx, maxy = self.bbox[i]
+            cand = np.flatnonzero((result < 0) & (x >= minx) & (x <= maxx) & (y >= miny) & (y <= maxy))
+            if not len(cand):
+                continue
+            x1, y1, x2, y2 = self.edges[self.owner == i].T
+            step = max(1, PIP_CHUNK // max(1, len(x1)))
+            for start in range(0, len(cand), step):
+                idx = cand[start:start + step]
+                px, py = x[idx, None], y[idx, None]
+                crosses = (y1 > py) != (y2 > py)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    x_at = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+                inside = (crosses & (px < x_at)).sum(axis=1) % 2 == 1
+                result[idx[inside]] = i
+        return result
+
+    def region_names(self, lats, lons):
+        idx = self.locate(lats, lons)
+        names = np.asarray(self.names, dtype=object)
+        return np.where(idx >= 0, names[np.maximum(idx, 0)], None)
+
+@lru_cache(maxsize=2)
+def _region_index(path, mtime):
+    return RegionIndex(_load_geojson(path, mtime, 0))
+
+def region_index(path=GEOJSON_PATH):
+    """Spatial index over the unsimplified region polygons, rebuilt when the file changes."""
+    return _region_index(path, os.path.getmtime(path))
+
+def _feature_region_ids(regions, index):
+    """Map feature index -> regions.id: by name first, else the region whose point lies inside."""
+    ids = np.full(len(index.names), -1)
+    by_name = {}
+    for r in regions:
+        by_name.setdefault(r["name"], r["id"])
+    for i, name in enumerate(index.names):
+        ids[i] = by_name.get(name, -1)
+    located = index.locate([r["latitude"] for r in regions], [r["longitude"] for r in regions])
+    for r, f in zip(regions, located):
+        if f >= 0 and ids[f] < 0:
+            ids[f] = r["id"]
+    return ids
+
+def locate_region_ids(lats, lons, regions, path=GEOJSON_PATH):
+    """regions.id for each point (None outside every mapped region); `regions` are rows of the regions table."""
+    index = region_index(path)
+    ids = _feature_region_ids(regions, index)
+    located = index.locate(lats, lons)
+    out = np.where(located >= 0, ids[np.maximum(located, 0)], -1)
+    return [int(v) if v >= 0 else None for v in out]
+
+def reassign_client_regions(only_missing=False, progress=None):
+    """Set clients.region_id from site coordinates in one transaction; returns rows changed."""
+    with db.transaction() as conn:
+        regions = [dict(r) for r in conn.execute("SELECT id, name, latitude, longitude FROM regions")]
+        where = "latitude IS NOT NULL AND longitude IS NOT NULL"
+        if only_missing:
+            where += " AND region_id IS NULL"
+        clients = conn.execute(f"SELECT id, region_id, latitude, longitude FROM clients WHERE {where}").fetchall()
+        if progress:
+            progress(0.3, f"Locating {len(clients)} clients")
+        region_ids = locate_region_ids([c["latitude"] for c in clients], [c["longitude"] for c in clients], regions)
+        ts = db.now_iso()
+        changes = [(rid, ts, c["id"]) for c, rid in zip(clients, region_ids) if rid is not None and rid != c["region_id"]]
+        conn.executemany("UPDATE clients SET region_id=?, updated_at=? WHERE id=?", changes)
+    return len(changes)
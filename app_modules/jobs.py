@@ -0,0 +1,149 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from . import db
+
+JOB_STATUSES = ["Queued", "Running", "Completed", "Failed", "Cancelled"]
+ACTIVE_STATUSES = ("Queued", "Running")
+MAX_WORKERS = int(os.environ.get("INTERTEK_JOB_WORKERS", "2"))
+RESULTS_DIR = os.path.join(os.path.dirname(db.DB_PATH), "job_results")
+# Bytes results (exports) live only on disk, newest KEEP_RESULT_FILES kept;
+# other results (import summaries) stay in memory, newest MAX_MEMORY_RESULTS kept.
+KEEP_RESULT_FILES = 20
+MAX_MEMORY_RESULTS = 50
+
+_lock = threading.Lock()
+_executor = None
+_futures = {}
+_cancel_flags = {}
+_results = OrderedDict()
+# Live progress of running jobs. Kept in memory because a job may report
+# progress while it holds the write transaction; persisted when it finishes.
+_live = {}
+
+class JobCancelled(Exception):
+    pass
+
+class JobContext:
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._flag = _cancel_flags[job_id]
+
+    @property
+    def cancelled(self):
+        return self._flag.is_set()
+
+    def progress(self, fraction, message=None):
+        if self.cancelled:
+            raise JobCancelled()
+        live = _live.setdefault(self.job_id, {})
+        live["progress"] = max(0.0, min(1.0, float(fraction)))
+        if message is not None:
+            live["message"] = message
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            # Jobs left active by a previous process can never finish.
+            for job in db.list_table("jobs", "WHERE status IN (?, ?)", ACTIVE_STATUSES):
+                db.update("jobs", job["id"], {"status": "Failed", "error": "Interrupted by restart"})
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="intertek-job")
+        return _executor
+
+def _store_result(job_id, result):
+    if not isinstance(result, (bytes, bytearray)):
+        with _lock:
+            _results[job_id] = result
+            while len(_results) > MAX_MEMORY_RESULTS:
+                _results.popitem(last=False)
+        return None
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"job_{job_id}.bin")
+    with open(path, "wb") as f:
+        f.write(result)
+    _prune_result_files()
+    return path
+
+def _prune_result_files():
+    files = sorted((e for e in os.scandir(RESULTS_DIR) if e.is_file()), key=lambda e: e.stat().st_mtime, reverse=True)
+    for entry in files[KEEP_RESULT_FILES:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+def _run(job_id, fn, args, kwargs):
+    ctx = JobContext(job_id)
+    try:
+        if ctx.cancelled:
+            raise JobCancelled()
+        db.update("jobs", job_id, {"status": "Running"})
+        result = fn(*args, progress=ctx.progress, **kwargs)
+        path = _store_result(job_id, result)
+        db.update("jobs", job_id, dict(_live.get(job_id, {}), status="Completed", progress=1.0, result_path=path))
+    except JobCancelled:
+        db.update("jobs", job_id, dict(_live.get(job_id, {}), status="Cancelled"))
+    except Exception as e:
+        db.update("jobs", job_id, dict(_live.get(job_id, {}), status="Failed", error=str(e)))
+    finally:
+        with _lock:
+            _futures.pop(job_id, None)
+            _cancel_flags.pop(job_id, None)
+            _live.pop(job_id, None)
+
+def submit(kind, fn, *args, **kwargs):
+    """Run `fn(*args, progress=..., **kwargs)` on the job pool and return the job id.
+
+    `progress(fraction, message=None)` records progress and raises
+    JobCancelled once the job has been cancelled, so long loops stop there.
+    """
+    executor = _get_executor()
+    job_id = db.insert("jobs", {"kind": kind, "status": "Queued", "progress": 0.0})
+    with _lock:
+        _cancel_flags[job_id] = threading.Event()
+        _futures[job_id] = executor.submit(_run, job_id, fn, args, kwargs)
+    return job_id
+
+def cancel(job_id):
+    with _lock:
+        flag = _cancel_flags.get(job_id)
+        future = _futures.get(job_id)
+    if flag is None:
+        return False
+    flag.set()
+    if future is not None and future.cancel():
+        # The job never started, so _run's cleanup will not run either.
+        with _lock:
+            _futures.pop(job_id, None)
+            _cancel_flags.pop(job_id, None)
+            _live.pop(job_id, None)
+        db.update("jobs", job_id, {"status": "Cancelled"})
+    return True
+
+def _with_live(job):
+    live = _live.get(job["id"])
+    if job["status"] in ACTIVE_STATUSES and live:
+        job.update(live)
+    return job
+
+def get(job_id):
+    rows = db.list_table("jobs", "WHERE id=?", (job_id,))
+    return _with_live(rows[0]) if rows else None
+
+def list_jobs(limit=20):
+    return [_with_live(j) for j in db.list_table("jobs", "ORDER BY id DESC LIMIT ?", (limit,))]
+
+def has_active(kind=None):
+    return any(j["status"] in ACTIVE_STATUSES and (kind is None or j["kind"] == kind) for j in list_jobs())
+
+def result(job_id):
+    summary = _results.get(job_id)
+    if summary is not None:
+        return summary
+    job = get(job_id)
+    if job and job["result_path"] and os.path.exists(job["result_path"]):
+        with open(job["result_path"], "rb") as f:
+            return f.read()
+    return None
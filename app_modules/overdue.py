@@ -0,0 +1,109 @@
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from . import db
+from .utils import parse_dates
+
+# A task is overdue when it is not Completed and its due date is before today
+# (UTC, matching the timestamps db writes). Buckets are days past due.
+AGING_BUCKETS = ["0–7", "8–30", "31–90", "90+"]
+AGING_EDGES = [7, 30, 90]
+UNASSIGNED = "Unassigned"
+
+_AGING_SQL = f"""
+SELECT owner, client_id,
+       CASE WHEN days <= 7 THEN '0–7' WHEN days <= 30 THEN '8–30' WHEN days <= 90 THEN '31–90' ELSE '90+' END AS bucket,
+       COUNT(*) AS n
+FROM (
+    SELECT owner, client_id, CAST(julianday(:today) - julianday(due_date) AS INTEGER) AS days
+    FROM tasks
+    WHERE COALESCE(status, '') != 'Completed' AND due_date < :today AND julianday(due_date) IS NOT NULL
+)
+GROUP BY 1, 2, 3
+"""
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def today():
+    return datetime.utcnow().date()
+
+def overdue_mask(df: pd.DataFrame, on=None):
+    """Vectorized overdue flag for a tasks frame."""
+    if df.empty or "due_date" not in df.columns:
+        return pd.Series(False, index=df.index)
+    due = parse_dates(df["due_date"])
+    return (df["status"] != "Completed") & due.notna() & (due < pd.Timestamp(on or today()))
+
+def days_overdue(df: pd.DataFrame, on=None):
+    """Days past due for overdue tasks, NaN for the rest."""
+    if df.empty or "due_date" not in df.columns:
+        return pd.Series(np.nan, index=df.index)
+    due = parse_dates(df["due_date"])
+    days = (pd.Timestamp(on or today()) - due).dt.days
+    return days.where(overdue_mask(df, on))
+
+def _summarize(grouped: pd.DataFrame):
+    """Fold (owner, client_id, bucket, n) rows into totals and breakdowns."""
+    if grouped.empty:
+        empty = pd.DataFrame(columns=AGING_BUCKETS + ["Total"])
+        return {"total": 0, "buckets": pd.Series(0, index=AGING_BUCKETS), "by_owner": empty, "by_client": empty.copy()}
+    def pivot(col):
+        out = grouped.pivot_table(index=col, columns="bucket", values="n", aggfunc="sum", fill_value=0)
+        out = out.reindex(columns=AGING_BUCKETS, fill_value=0)
+        out["Total"] = out.sum(axis=1)
+        return out.sort_values("Total", ascending=False)
+    buckets = grouped.groupby("bucket")["n"].sum().reindex(AGING_BUCKETS, fill_value=0)
+    return {
+        "total": int(buckets.sum()),
+        "buckets": buckets,
+        "by_owner": pivot("owner"),
+        "by_client": pivot("client_id"),
+    }
+
+def _owner_names(raw, index):
+    """Display names for raw owner values, merged the way `index` (an OwnerIndex) merges them."""
+    from .owners import normalize_owner  # owners imports this module
+    names = {}
+    for owner in raw:
+        if owner not in names:
+            code = index.code(owner)
+            names[owner] = index.names[code] if code >= 0 else normalize_owner(owner)
+    return [names[o] for o in raw]
+
+def summarize(df: pd.DataFrame, on=None):
+    """Overdue total, aging buckets and per-owner/per-client breakdowns of a (filtered) tasks frame."""
+    days = days_overdue(df, on)
+    hit = days.notna()
+    if not hit.any():
+        return _summarize(pd.DataFrame())
+    # Owners merge as in owners.owner_stats() over the same frame, so the two tables agree.
+    from .owners import OwnerIndex
+    index = OwnerIndex(df["id"], df["owner"])
+    owners = pd.Series(index.names[index.codes[hit.to_numpy()]], index=df.index[hit])
+    grouped = pd.DataFrame({
+        "owner": owners,
+        "client_id": df.loc[hit, "client_id"],
+        "bucket": np.asarray(AGING_BUCKETS, dtype=object)[np.searchsorted(AGING_EDGES, days[hit], side="left")],
+        "n": 1,
+    })
+    return _summarize(grouped.groupby(["owner", "client_id", "bucket"], dropna=False)["n"].sum().reset_index())
+
+def overdue_summary(on=None):
+    """Same as summarize() over the whole tasks table, computed in SQL and cached per data version."""
+    on = on or today()
+    key = (db.DB_PATH, db.table_versions(["tasks"]), on)
+    summary = _cache.get(key)
+    if summary is None:
+        with db.reader() as conn:
+            rows = conn.execute(_AGING_SQL, {"today": on.isoformat()}).fetchall()
+        grouped = pd.DataFrame([dict(r) for r in rows], columns=["owner", "client_id", "bucket", "n"])
+        if not grouped.empty:
+            from .owners import owner_index
+            grouped["owner"] = _owner_names(grouped["owner"], owner_index())
+        summary = _summarize(grouped)
+        with _cache_lock:
+            _cache.clear()
+            _cache[key] = summary
+    return summary
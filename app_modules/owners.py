@@ -0,0 +1,124 @@
+import re
+import threading
+import numpy as np
+import pandas as pd
+from . import db
+from .overdue import UNASSIGNED, overdue_mask, today
+from .utils import parse_dates
+
+# Completions counted as recent throughput.
+THROUGHPUT_WINDOW_DAYS = 28
+
+_WS = re.compile(r"\s+")
+_cache = {}
+_cache_lock = threading.Lock()
+
+def normalize_owner(name):
+    """Display form of an owner: trimmed with single spaces, or UNASSIGNED."""
+    if name is None or (isinstance(name, float) and np.isnan(name)):
+        return UNASSIGNED
+    name = _WS.sub(" ", str(name)).strip()
+    return name or UNASSIGNED
+
+class OwnerIndex:
+    """Dictionary-encoded task owners.
+
+    Owners differing only in case or spacing share one code. `codes[i]` is
+    the code of the i-th task (aligned with `task_ids`), `names[c]` the
+    display name (first spelling seen) and `lookup` maps lowercase keys to codes.
+    """
+
+    def __init__(self, task_ids, owners):
+        # Normalize each distinct raw spelling once, then merge spellings by key.
+        raw_codes, raw = pd.factorize(pd.Series(owners, dtype=object), use_na_sentinel=False)
+        display = np.asarray([normalize_owner(o) for o in raw], dtype=object)
+        key_codes, keys = pd.factorize(pd.Series(display, dtype=object).str.casefold())
+        self.task_ids = np.asarray(task_ids)
+        self.codes = key_codes[raw_codes] if len(raw_codes) else np.empty(0, dtype=np.intp)
+        self.keys = np.asarray(keys, dtype=object)
+        first = pd.Series(np.arange(len(key_codes))).groupby(key_codes).first().to_numpy()
+        self.names = display[first] if len(first) else np.empty(0, dtype=object)
+        self.lookup = {k: i for i, k in enumerate(self.keys)}
+
+    def code(self, owner):
+        return self.lookup.get(normalize_owner(owner).casefold(), -1)
+
+    def search(self, text):
+        """Codes whose owner contains `text` (case-insensitive); scans owners, not tasks."""
+        needle = normalize_owner(text).casefold()
+        return np.flatnonzero([needle in k for k in self.keys])
+
+    def task_ids_for(self, text):
+        return self.task_ids[np.isin(self.codes, self.search(text))]
+
+def _grouped_median(codes, values, n_groups):
+    """Median of `values` per code, NaN for codes without values."""
+    out = np.full(n_groups, np.nan)
+    ok = ~np.isnan(values)
+    codes, values = codes[ok], values[ok]
+    if not len(codes):
+        return out
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+    groups, starts, counts = np.unique(codes, return_index=True, return_counts=True)
+    out[groups] = (values[starts + (counts - 1) // 2] + values[starts + counts // 2]) / 2
+    return out
+
+def owner_stats(df: pd.DataFrame, on=None, window_days=THROUGHPUT_WINDOW_DAYS):
+    """Per-owner open load, overdue, throughput and median cycle time for a tasks frame."""
+    columns = ["Owner", "Open", "Overdue", f"Completed ({window_days}d)", "Completed", "Per Week",
+               "Median Cycle (days)"]
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+    index = OwnerIndex(df["id"], df["owner"])
+    n = len(index.names)
+    codes = index.codes
+    done = (df["status"] == "Completed").to_numpy()
+    completed_on = parse_dates(df["completed_date"])
+    started_on = parse_dates(df["start_date"])
+    cycle = (completed_on - started_on).dt.days.to_numpy(dtype=float, copy=True)
+    cycle[~done | (cycle < 0)] = np.nan
+    cutoff = pd.Timestamp(on or today()) - pd.Timedelta(days=window_days)
+    recent = done & (completed_on >= cutoff).to_numpy()
+    out = pd.DataFrame({
+        "Owner": index.names,
+        "Open": np.bincount(codes, weights=~done, minlength=n).astype(int),
+        "Overdue": np.bincount(codes, weights=overdue_mask(df, on).to_numpy(), minlength=n).astype(int),
+        columns[3]: np.bincount(codes, weights=recent, minlength=n).astype(int),
+        "Completed": np.bincount(codes, weights=done, minlength=n).astype(int),
+    })
+    out["Per Week"] = (out[columns[3]] * 7 / window_days).round(1)
+    out["Median Cycle (days)"] = _grouped_median(codes, cycle, n)
+    return out.sort_values(["Open", "Overdue"], ascending=False, ignore_index=True)
+
+def _load():
+    with db.reader() as conn:
+        rows = conn.execute("SELECT id, owner, status, start_date, due_date, completed_date FROM tasks").fetchall()
+    return pd.DataFrame([dict(r) for r in rows],
+                        columns=["id", "owner", "status", "start_date", "due_date", "completed_date"])
+
+def _cached(kind, build):
+    key = (db.DB_PATH, db.table_versions(["tasks"]), today())
+    with _cache_lock:
+        if _cache.get("key") != key:
+            _cache.clear()
+            _cache["key"] = key
+        value = _cache.get(kind)
+    if value is None:
+        # Built outside the lock: build() may itself call _cached().
+        value = build()
+        with _cache_lock:
+            if _cache.get("key") == key:
+                _cache[kind] = value
+    return value
+
+def owner_index():
+    """OwnerIndex over every task, cached per tasks data version."""
+    def build():
+        df = _cached("frame", _load)
+        return OwnerIndex(df["id"], df["owner"])
+    return _cached("index", build)
+
+def team_stats():
+    """owner_stats() over every task, cached per tasks data version."""
+    return _cached("stats", lambda: owner_stats(_cached("frame", _load)))
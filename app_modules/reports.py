@@ -0,0 +1,179 @@
+import io
+import json
+import os
+import shutil
+import threading
+import pandas as pd
+from . import db, overdue, owners
+from .utils import df_from_records
+
+# Default-view Analytics artifacts (Plotly JSON, KPIs, tables and an Excel
+# summary) rendered in the background into REPORTS_DIR/<key>, where the key
+# is the UTC date plus the versions of REPORT_TABLES. A missing directory just
+# means the page renders live until the scheduler catches up.
+REPORTS_DIR = os.path.join(os.path.dirname(db.DB_PATH), "reports")
+REPORT_TABLES = ["industries", "clients", "tasks"]
+KEEP_REPORTS = 3
+# Seconds between checks for changed data; 0 disables the scheduler.
+SCHEDULE_INTERVAL_S = float(os.environ.get("INTERTEK_REPORT_INTERVAL_S", "30"))
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_thread = None
+_loaded = {}
+
+def _noop(*_args, **_kwargs):
+    pass
+
+def report_key():
+    return f"{overdue.today().isoformat()}_" + "-".join(str(v) for v in db.table_versions(REPORT_TABLES))
+
+def kpis(tasks_df: pd.DataFrame):
+    """Headline counts for a (possibly filtered) tasks frame."""
+    if tasks_df.empty:
+        return {"total": 0, "completed": 0, "in_progress": 0, "overdue": 0}
+    return {
+        "total": int(len(tasks_df)),
+        "completed": int((tasks_df["status"] == "Completed").sum()),
+        "in_progress": int((tasks_df["status"] == "In Progress").sum()),
+        "overdue": int(overdue.overdue_mask(tasks_df).sum()),
+    }
+
+def figures(tasks_df, clients_df, industries_df, team_df):
+    """Styled Analytics figures for a (possibly filtered) tasks frame, keyed by chart name."""
+    import plotly.express as px
+    from . import charts
+    figs = {
+        "status_funnel": charts.status_funnel(tasks_df),
+        "on_time": charts.on_time_completion(tasks_df),
+        "start_dates": charts.tasks_histogram(tasks_df, field="start_date"),
+        "due_dates": charts.tasks_histogram(tasks_df, field="due_date"),
+        "overdue_trend": charts.overdue_trend(tasks_df),
+        "overdue_aging": charts.overdue_aging(tasks_df),
+        "industry": charts.workload_by_industry(tasks_df, clients_df, industries_df),
+        "owner_workload": charts.owner_workload(team_df),
+    }
+    figs["status_funnel"].update_traces(marker=dict(color=["#4CAF50", "#2196F3", "#FFC107", "#F44336"]))
+    figs["on_time"].update_traces(marker_colors=["#4CAF50", "#F44336"])
+    figs["start_dates"].update_traces(marker_color="#2196F3")
+    figs["due_dates"].update_traces(marker_color="#FF9800")
+    figs["overdue_trend"].update_traces(line_color="red", line=dict(width=3))
+    figs["overdue_aging"].update_traces(marker_color="#F44336")
+    figs["industry"].update_traces(marker=dict(color=px.colors.qualitative.Set2))
+    return figs
+
+def _excel(kpi, tables):
+    out = io.BytesIO()
+    with pd.ExcelWriter(out, engine="xlsxwriter") as writer:
+        pd.DataFrame({"KPI": list(kpi), "Value": list(kpi.values())}).to_excel(writer, sheet_name="KPIs", index=False)
+        for name, df in tables.items():
+            df.to_excel(writer, sheet_name=name[:31], index=df.index.name is not None)
+    return out.getvalue()
+
+def render(progress=_noop):
+    """Render the default-view artifacts for the current data; returns the report key."""
+    key = report_key()
+    target = os.path.join(REPORTS_DIR, key)
+    if os.path.isdir(target):
+        return key
+    progress(0.0, "Loading data")
+    tasks = df_from_records(db.list_table("tasks"))
+    clients = df_from_records(db.list_table("clients"))
+    industries = df_from_records(db.list_table("industries"))
+    team = owners.team_stats()
+    progress(0.3, "Building figures")
+    figs = figures(tasks, clients, industries, team)
+    kpi = kpis(tasks)
+    aging = overdue.overdue_summary()
+    tables = {
+        "Status": tasks.groupby("status").size().rename("Count").to_frame() if not tasks.empty else pd.DataFrame(),
+        "Overdue by Owner": aging["by_owner"],
+        "Owner Workload": team,
+    }
+    progress(0.7, "Writing artifacts")
+    tmp = f"{target}.tmp-{os.getpid()}-{threading.get_ident()}"
+    os.makedirs(tmp, exist_ok=True)
+    for name, fig in figs.items():
+        with open(os.path.join(tmp, f"{name}.json"), "w", encoding="utf-8") as f:
+            f.write(fig.to_json())
+    manifest = {
+        "key": key,
+        "kpis": kpi,
+        "statuses": sorted(set(tasks["status"].dropna())) if not tasks.empty else [],
+        "figures": sorted(figs),
+        "tables": {"by_owner": aging["by_owner"].to_json(orient="table"), "team": team.to_json(orient="table")},
+    }
+    with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    with open(os.path.join(tmp, "summary.xlsx"), "wb") as f:
+        f.write(_excel(kpi, tables))
+    try:
+        os.replace(tmp, target)
+    except OSError:
+        # Another process published this key first.
+        shutil.rmtree(tmp, ignore_errors=True)
+    _prune()
+    progress(1.0, "Done")
+    return key
+
+def _prune():
+    dirs = sorted((e for e in os.scandir(REPORTS_DIR) if e.is_dir() and ".tmp-" not in e.name),
+                  key=lambda e: e.stat().st_mtime, reverse=True)
+    for entry in dirs[KEEP_REPORTS:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+        with _lock:
+            _loaded.pop(entry.name, None)
+
+def load(key):
+    """Artifacts stored under `key`, or None if they have not been rendered."""
+    report = _loaded.get(key)
+    if report is not None:
+        return report
+    path = os.path.join(REPORTS_DIR, key)
+    try:
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        import plotly.io as pio
+        figs = {name: pio.read_json(os.path.join(path, f"{name}.json")) for name in manifest["figures"]}
+    except (OSError, ValueError):
+        return None
+    report = {
+        "key": key,
+        "kpis": manifest["kpis"],
+        "statuses": manifest["statuses"],
+        "figures": figs,
+        "tables": {name: pd.read_json(io.StringIO(s), orient="table") for name, s in manifest["tables"].items()},
+        "excel_path": os.path.join(path, "summary.xlsx"),
+    }
+    with _lock:
+        _loaded.clear()
+        _loaded[key] = report
+    return report
+
+def current():
+    """Artifacts for the current data, or None (and a render is requested) if not ready yet."""
+    start_scheduler()
+    report = load(report_key())
+    if report is None:
+        _wake.set()
+    return report
+
+def _loop():
+    while True:
+        _wake.clear()
+        try:
+            render()
+        except Exception:
+            # Rendering is best-effort; the page falls back to live charts.
+            pass
+        _wake.wait(SCHEDULE_INTERVAL_S)
+
+def start_scheduler():
+    """Start the background renderer once per process (no-op if disabled)."""
+    global _thread
+    if SCHEDULE_INTERVAL_S <= 0:
+        return
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_loop, name="intertek-reports", daemon=True)
+            _thread.start()
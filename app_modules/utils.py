@@ -1,9 +1,13 @@
+import os
+from functools import lru_cache
 import pandas as pd
 from dateutil import parser
 from datetime import datetime, date
+from . import db
 
 STATUSES = ["Open", "In Progress", "Completed", "Blocked"]
 PRIORITIES = ["Low", "Medium", "High", "Critical"]
+HIDDEN_COLUMNS = ["created_at", "updated_at", "natural_key", "row_hash", "source_key"]
 
 def coerce_date(x):
     if not x:
@@ -15,7 +19,49 @@ def coerce_date(x):
     except Exception:
         return None
 
+def parse_dates(values: pd.Series):
+    """Vectorized date parsing: ISO strings in one pass, anything else via coerce_date."""
+    parsed = pd.to_datetime(values, errors="coerce", format="ISO8601")
+    leftover = parsed.isna() & values.notna()
+    if leftover.any():
+        parsed[leftover] = pd.to_datetime(values[leftover].map(coerce_date), errors="coerce")
+    return parsed.dt.normalize()
+
+ASSETS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "assets"))
+
+@lru_cache(maxsize=8)
+def _read_text(path, mtime):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+def load_css(name="styles.css"):
+    path = os.path.join(ASSETS_DIR, name)
+    return _read_text(path, os.path.getmtime(path))
+
 def df_from_records(records):
     if not records:
         return pd.DataFrame()
     return pd.DataFrame(records)
+
+def apply_delta(df: pd.DataFrame, delta: dict, key="id"):
+    upserts = df_from_records(delta["upserts"])
+    if df.empty or delta.get("full"):
+        return upserts
+    drop = set(delta["deleted"])
+    if not upserts.empty:
+        drop.update(upserts[key].tolist())
+    kept = df[~df[key].isin(drop)]
+    if upserts.empty:
+        return kept.reset_index(drop=True)
+    return pd.concat([kept, upserts], ignore_index=True).sort_values(key).reset_index(drop=True)
+
+def synced_frame(store, table):
+    """`table` as a DataFrame cached in `store` (e.g. st.session_state) and
+    refreshed with only the rows changed since the previous call."""
+    name = f"_synced_{table}"
+    version, df = store.get(name, (0, pd.DataFrame()))
+    delta = db.fetch_delta(table, version)
+    if delta["full"] or delta["upserts"] or delta["deleted"]:
+        df = apply_delta(df, delta)
+    store[name] = (delta["version"], df)
+    return df
@@ -0,0 +1,68 @@
+"""Cold-start and first-paint timings for the dashboard pages.
+
+Each measurement runs in a fresh interpreter against a scratch copy of
+data/intertek.db, so nothing is shared between runs:
+
+    python benchmarks/bench_startup.py [--repeat 5] [page ...]
+
+* import   - `import app_modules` plus the submodules the page uses
+* first    - first full script run of the page (imports, init_db, render)
+* rerun    - a second run in the same process, i.e. a warm Streamlit rerun
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+PROBE = r"""
+import json, os, sys, time
+sys.path.insert(0, os.environ["BENCH_ROOT"])
+page = os.path.join(os.environ["BENCH_ROOT"], sys.argv[1])
+t0 = time.perf_counter()
+import app_modules
+for line in open(page, encoding="utf-8"):
+    if line.startswith("from app_modules import "):
+        for name in line.split("import", 1)[1].split(","):
+            getattr(app_modules, name.strip())
+t1 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t2 = time.perf_counter()
+at = AppTest.from_file(page, default_timeout=120).run()
+t3 = time.perf_counter()
+at.run()
+t4 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "first": t3 - t2, "rerun": t4 - t3, "errors": len(at.exception)}))
+"""
+
+def measure(page, db_path):
+    env = dict(os.environ, BENCH_ROOT=ROOT, INTERTEK_DB_PATH=db_path)
+    out = subprocess.run([sys.executable, "-c", PROBE, page], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("pages", nargs="*")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    pages = args.pages or ["app.py"] + sorted(os.path.relpath(p, ROOT) for p in glob.glob(os.path.join(ROOT, "pages", "*.py")))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "intertek.db")
+        shutil.copy(os.path.join(ROOT, "data", "intertek.db"), db_path)
+        print(f"{'page':<28}{'import ms':>11}{'first ms':>11}{'rerun ms':>11}")
+        for page in pages:
+            runs = [measure(page, db_path) for _ in range(args.repeat)]
+            med = {k: statistics.median(r[k] for r in runs) * 1000 for k in ("import", "first", "rerun")}
+            flag = "  (errors)" if any(r["errors"] for r in runs) else ""
+            print(f"{page:<28}{med['import']:>11.0f}{med['first']:>11.0f}{med['rerun']:>11.0f}{flag}")
+
+if __name__ == "__main__":
+    main()
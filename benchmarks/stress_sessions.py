@@ -0,0 +1,105 @@
+"""Simulate concurrent dashboard sessions reading and writing the database.
+
+Each session thread repeatedly loads the full tasks table (as every page does)
+and every few reads toggles a task's status (as the Tasks checklist does). A
+bulk writer periodically holds a long write transaction, like an import.
+Read latency should stay flat while writes are in flight:
+
+    python benchmarks/stress_sessions.py [--sessions 8] [--seconds 10] [--legacy]
+
+--legacy runs with the rollback journal (INTERTEK_DB_WAL=0) for comparison.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+def pct(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sessions", type=int, default=8)
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--tasks", type=int, default=2000)
+    ap.add_argument("--write-every", type=int, default=3, help="reads between a session's writes")
+    ap.add_argument("--legacy", action="store_true")
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        run(args, tmp)
+
+def run(args, tmp):
+    os.environ["INTERTEK_DB_PATH"] = os.path.join(tmp, "stress.db")
+    if args.legacy:
+        os.environ["INTERTEK_DB_WAL"] = "0"
+    sys.path.insert(0, ROOT)
+    from app_modules import db
+
+    db.init_db()
+    ts = db.now_iso()
+    with db.transaction() as conn:
+        conn.executemany("INSERT INTO clients(name, created_at, updated_at) VALUES (?, ?, ?)",
+                         [(f"Client {i}", ts, ts) for i in range(200)])
+        conn.executemany(
+            "INSERT INTO tasks(title, client_id, owner, status, due_date, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(f"Task {i}", i % 200 + 1, f"Owner {i % 25}", "Open", "2025-01-01", ts, ts) for i in range(args.tasks)],
+        )
+
+    deadline = time.perf_counter() + args.seconds
+    lock = threading.Lock()
+    reads, writes, errors = [], [], []
+
+    def session(seed):
+        rng = random.Random(seed)
+        n = 0
+        while time.perf_counter() < deadline:
+            try:
+                t = time.perf_counter()
+                db.list_table("tasks")
+                r = time.perf_counter() - t
+                w = None
+                n += 1
+                if n % args.write_every == 0:
+                    t = time.perf_counter()
+                    db.update("tasks", rng.randint(1, args.tasks), {"status": rng.choice(["Open", "Completed"])})
+                    w = time.perf_counter() - t
+                with lock:
+                    reads.append(r)
+                    if w is not None:
+                        writes.append(w)
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+
+    def bulk_writer():
+        while time.perf_counter() < deadline:
+            with db.transaction() as conn:
+                conn.execute("UPDATE tasks SET owner = owner WHERE id % 50 = 0")
+                time.sleep(0.5)
+            time.sleep(0.5)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(args.sessions)]
+    threads.append(threading.Thread(target=bulk_writer))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    mode = "rollback journal" if args.legacy else "WAL + read pool"
+    print(f"{mode}: {args.sessions} sessions, {args.tasks} tasks, {args.seconds:.0f}s")
+    print(f"  reads  {len(reads):>6}  p50 {pct(reads, .5):7.1f} ms  p95 {pct(reads, .95):7.1f} ms  max {pct(reads, 1):7.1f} ms")
+    print(f"  writes {len(writes):>6}  p50 {pct(writes, .5):7.1f} ms  p95 {pct(writes, .95):7.1f} ms  max {pct(writes, 1):7.1f} ms")
+    print(f"  errors {len(errors)}" + (f" (first: {errors[0]})" if errors else ""))
+    if not args.legacy:
+        print(f"  checkpoint (busy, wal frames, checkpointed): {db.checkpoint('TRUNCATE')}")
+
+if __name__ == "__main__":
+    main()
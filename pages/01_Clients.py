@@ -1,6 +1,6 @@
+import pandas as pd
 import streamlit as st
-from app_modules import db
-from app_modules.utils import df_from_records
+from app_modules import db, geo
 
 st.set_page_config(page_title="Clients", page_icon="👥", layout="wide")
 db.init_db()
@@ -31,6 +31,10 @@ with st.expander("➕ Add New Client", expanded=False):
         contact_person = st.text_input("Contact Person")
         contact_email = st.text_input("Contact Email")
         contact_phone = st.text_input("Contact Phone")
+        g1, g2 = st.columns(2)
+        latitude = g1.number_input("Site Latitude", value=None, min_value=-90.0, max_value=90.0, format="%.5f")
+        longitude = g2.number_input("Site Longitude", value=None, min_value=-180.0, max_value=180.0, format="%.5f")
+        st.caption("With site coordinates and no region chosen, the region is derived from the map.")
         notes = st.text_area("Notes")
 
         submitted = st.form_submit_button("Create Client")
@@ -46,10 +50,14 @@ with st.expander("➕ Add New Client", expanded=False):
                     "contact_email": contact_email.strip() or None,
                     "contact_phone": contact_phone.strip() or None,
                     "notes": notes or None,
-                    "is_active": 1
+                    "is_active": 1,
+                    "latitude": latitude,
+                    "longitude": longitude,
                 }
+                if payload["region_id"] is None and latitude is not None and longitude is not None:
+                    payload["region_id"] = geo.locate_region_ids([latitude], [longitude], regions)[0]
                 try:
-                    db.insert("clients", payload)
+                    db.queued_insert("clients", payload).result()
                     st.success("Client created.")
                 except Exception as e:
                     st.error(f"Error: {e}")
@@ -59,23 +67,74 @@ st.divider()
 # ------------------------------------------------
 # Clients List & Edit
 # ------------------------------------------------
-clients = df_from_records(db.list_table("clients"))
-if clients.empty:
+SORT_LABELS = {
+    "name": "Name",
+    "open_tasks": "Open tasks",
+    "next_due_date": "Next due",
+    "last_activity": "Last activity",
+    "on_time_rate": "On-time rate",
+    "completed_tasks": "Completed tasks",
+}
+
+PAGE_SIZE = 50
+
+f1, f2, f3, f4 = st.columns([3, 2, 1, 1])
+search = f1.text_input("Search clients", placeholder="Name contains…")
+sort = f2.selectbox("Sort by", options=list(SORT_LABELS), format_func=SORT_LABELS.get)
+descending = f3.toggle("Descending", value=sort in ("open_tasks", "last_activity", "completed_tasks"))
+active_only = f4.toggle("Active only")
+
+def load_page(page):
+    return db.client_summaries(sort=sort, descending=descending, limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE,
+                               search=search, active_only=active_only)
+
+page = st.session_state.get("clients_page", 1)
+rows, total = load_page(page)
+pages = max(1, -(-total // PAGE_SIZE))
+if page > pages:
+    # The filter shrank the result set; show its last page instead.
+    page = st.session_state["clients_page"] = pages
+    rows, total = load_page(page)
+
+if total == 0 and not (search or active_only):
     st.warning("No clients yet. Add your first client above.")
+elif total == 0:
+    st.info("No clients match the current filter.")
 else:
-    st.dataframe(clients.drop(columns=["created_at", "updated_at"]), use_container_width=True, hide_index=True)
+    summary = pd.DataFrame(rows, columns=["id", "name", "industry", "region", "is_active", "open_tasks", "has_overdue",
+                                          "next_due_date", "completed_tasks", "on_time_rate", "last_activity"])
+    summary["on_time_rate"] = summary["on_time_rate"] * 100
+    st.caption(f"{total} client(s)")
+    st.dataframe(
+        summary,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "id": None,
+            "name": "Client",
+            "industry": "Industry",
+            "region": "Region",
+            "is_active": st.column_config.CheckboxColumn("Active"),
+            "open_tasks": "Open",
+            "has_overdue": st.column_config.CheckboxColumn("Overdue"),
+            "next_due_date": "Next Due",
+            "completed_tasks": "Completed",
+            "on_time_rate": st.column_config.ProgressColumn("On-time", format="%.0f%%", min_value=0, max_value=100),
+            "last_activity": "Last Activity",
+        },
+    )
+    if pages > 1:
+        st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key="clients_page")
 
     # Wrap edit section in expander
     with st.expander("✏️ Edit / Archive Client", expanded=False):
-        ids = clients["id"].tolist()
-        target_id = st.selectbox(
-            "Select Client",
-            options=ids,
-            format_func=lambda i: clients.loc[clients["id"] == i, "name"].values[0] if i in ids else "-"
-        )
+        names = {r["id"]: r["name"] for r in rows}
+        st.caption("Clients on the current page; search above to find others.")
+        target_id = st.selectbox("Select Client", options=list(names), format_func=names.get)
 
-        if target_id:
-            row = clients[clients["id"] == target_id].iloc[0]
+        found = db.list_table("clients", "WHERE id=?", (int(target_id),)) if target_id else []
+        if found:
+            row = found[0]
             with st.form("edit_client"):
                 name = st.text_input("Client Name*", value=row["name"])
                 industry = st.selectbox(
@@ -93,6 +152,11 @@ else:
                 contact_person = st.text_input("Contact Person", value=row.get("contact_person") or "")
                 contact_email = st.text_input("Contact Email", value=row.get("contact_email") or "")
                 contact_phone = st.text_input("Contact Phone", value=row.get("contact_phone") or "")
+                g1, g2 = st.columns(2)
+                latitude = g1.number_input("Site Latitude", value=None if pd.isna(row.get("latitude")) else float(row["latitude"]),
+                                           min_value=-90.0, max_value=90.0, format="%.5f")
+                longitude = g2.number_input("Site Longitude", value=None if pd.isna(row.get("longitude")) else float(row["longitude"]),
+                                            min_value=-180.0, max_value=180.0, format="%.5f")
                 notes = st.text_area("Notes", value=row.get("notes") or "")
                 is_active = st.checkbox("Active", value=bool(row["is_active"]))
 
@@ -107,15 +171,19 @@ else:
                             "contact_email": contact_email.strip() or None,
                             "contact_phone": contact_phone.strip() or None,
                             "notes": notes or None,
-                            "is_active": 1 if is_active else 0
+                            "is_active": 1 if is_active else 0,
+                            "latitude": latitude,
+                            "longitude": longitude,
                         }
-                        db.update("clients", int(target_id), payload)
+                        if payload["region_id"] is None and latitude is not None and longitude is not None:
+                            payload["region_id"] = geo.locate_region_ids([latitude], [longitude], regions)[0]
+                        db.queued_update("clients", int(target_id), payload).result()
                         st.success("Updated.")
                 with c2:
                     if st.form_submit_button("Archive (Deactivate)"):
-                        db.update("clients", int(target_id), {"is_active": 0})
+                        db.queued_update("clients", int(target_id), {"is_active": 0}).result()
                         st.info("Client archived.")
                 with c3:
                     if st.form_submit_button("Delete Permanently"):
-                        db.delete("clients", int(target_id))
+                        db.queued_delete("clients", int(target_id)).result()
                         st.warning("Deleted.")
@@ -1,7 +1,7 @@
 import streamlit as st
 from datetime import date
 from app_modules import db
-from app_modules.utils import df_from_records, STATUSES, PRIORITIES
+from app_modules.utils import df_from_records, STATUSES, PRIORITIES, HIDDEN_COLUMNS
 
 st.set_page_config(page_title="Tasks", page_icon="✅", layout="wide")
 db.init_db()
@@ -46,7 +46,7 @@ with st.expander("➕ Add Task", expanded=False):
                     "description": description or None,
                 }
                 try:
-                    db.insert("tasks", payload)
+                    db.queued_insert("tasks", payload).result()
                     st.success("Task created.")
                     st.rerun()
                 except Exception as e:
@@ -72,16 +72,16 @@ else:
         )
         if new_state != is_done:
             if new_state:
-                db.update("tasks", int(row["id"]), {
+                db.queued_update("tasks", int(row["id"]), {
                     "status": "Completed",
                     "completed_date": str(date.today())
-                })
+                }).result()
                 st.success(f"Marked '{row['title']}' as Completed.")
             else:
-                db.update("tasks", int(row["id"]), {
+                db.queued_update("tasks", int(row["id"]), {
                     "status": "Open",
                     "completed_date": None
-                })
+                }).result()
                 st.info(f"Reopened '{row['title']}'.")
             st.rerun()
 
@@ -91,7 +91,7 @@ else:
     # Full Data Table
     # -------------------------------
     st.dataframe(
-        tasks.drop(columns=["created_at","updated_at"]),
+        tasks.drop(columns=HIDDEN_COLUMNS, errors="ignore"),
         use_container_width=True,
         hide_index=True
     )
@@ -143,13 +143,13 @@ else:
                             "completed_date": str(completed_date) if completed_date else None,
                             "description": description or None,
                         }
-                        db.update("tasks", int(target_id), payload)
+                        db.queued_update("tasks", int(target_id), payload).result()
                         st.success("Updated.")
                 with c2:
                     if st.form_submit_button("Mark Completed Today"):
-                        db.update("tasks", int(target_id), {"status": "Completed", "completed_date": str(date.today())})
+                        db.queued_update("tasks", int(target_id), {"status": "Completed", "completed_date": str(date.today())}).result()
                         st.success("Marked completed.")
                 with c3:
                     if st.form_submit_button("Delete Task"):
-                        db.delete("tasks", int(target_id))
+                        db.queued_delete("tasks", int(target_id)).result()
                         st.warning("Deleted.")
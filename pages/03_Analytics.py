@@ -1,14 +1,6 @@
 import streamlit as st
-from app_modules import db
+from app_modules import db, overdue, owners, reports
 from app_modules.utils import df_from_records
-from app_modules.charts import (
-    status_funnel,
-    tasks_histogram,
-    workload_by_industry,
-    on_time_completion,
-    overdue_trend
-)
-import plotly.express as px
 
 st.set_page_config(page_title="Analytics & Reports", page_icon="📈", layout="wide")
 db.init_db()
@@ -20,27 +12,21 @@ st.markdown(
 )
 
 # ------------------------------------------------
-# Load Data
+# Load Data (the unfiltered view comes from pre-rendered artifacts when ready)
 # ------------------------------------------------
-tasks = df_from_records(db.list_table("tasks"))
-clients = df_from_records(db.list_table("clients"))
-industries = df_from_records(db.list_table("industries"))
+report = reports.current()
+tasks = None if report else df_from_records(db.list_table("tasks"))
 
 # ------------------------------------------------
 # KPI Cards
 # ------------------------------------------------
-if not tasks.empty:
-    total = len(tasks)
-    completed = len(tasks[tasks["status"] == "Completed"])
-    overdue = len(tasks[(tasks["due_date"].notna()) &
-                        (tasks["status"] != "Completed")])
-    in_progress = len(tasks[tasks["status"] == "In Progress"])
-
+kpi = report["kpis"] if report else reports.kpis(tasks)
+if kpi["total"]:
     c1, c2, c3, c4 = st.columns(4)
-    c1.metric("📌 Total Tasks", total)
-    c2.metric("✅ Completed", completed)
-    c3.metric("🚧 In Progress", in_progress)
-    c4.metric("⚠️ Overdue", overdue)
+    c1.metric("📌 Total Tasks", kpi["total"])
+    c2.metric("✅ Completed", kpi["completed"])
+    c3.metric("🚧 In Progress", kpi["in_progress"])
+    c4.metric("⚠️ Overdue", kpi["overdue"])
 else:
     st.info("No tasks available yet. Add tasks to see analytics.")
 
@@ -56,18 +42,31 @@ with st.expander("🔍 Filters", expanded=True):
     with c2:
         status_filter = st.multiselect(
             "Filter by Status",
-            options=sorted(set(tasks["status"])) if not tasks.empty else [],
+            options=report["statuses"] if report else sorted(set(tasks["status"])) if not tasks.empty else [],
             default=None
         )
 
+filtered = bool(owner_filter or status_filter)
+if report and not filtered:
+    figs, tables = report["figures"], report["tables"]
+    aging_by_owner, team = tables["by_owner"], tables["team"]
+    with open(report["excel_path"], "rb") as fh:
+        st.download_button("⬇️ Download summary (.xlsx)", data=fh.read(), file_name="intertek_summary.xlsx",
+                           mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+else:
+    if tasks is None:
+        tasks = df_from_records(db.list_table("tasks"))
+    f = tasks
     if not tasks.empty:
-        f = tasks.copy()
         if owner_filter:
-            f = f[f["owner"].fillna("").str.contains(owner_filter, case=False)]
+            f = f[f["id"].isin(owners.owner_index().task_ids_for(owner_filter))]
         if status_filter:
             f = f[f["status"].isin(status_filter)]
-    else:
-        f = tasks
+    clients = df_from_records(db.list_table("clients"))
+    industries = df_from_records(db.list_table("industries"))
+    team = owners.owner_stats(f) if filtered else owners.team_stats()
+    figs = reports.figures(f, clients, industries, team)
+    aging_by_owner = overdue.summarize(f)["by_owner"] if not f.empty else None
 
 st.markdown("---")
 
@@ -78,16 +77,12 @@ st.subheader("📌 Task Status & Completion Performance")
 
 c1, c2 = st.columns(2)
 with c1:
-    fig1 = status_funnel(f)
-    fig1.update_traces(marker=dict(color=["#4CAF50", "#2196F3", "#FFC107", "#F44336"]))  # green, blue, amber, red
-    st.plotly_chart(fig1, use_container_width=True)
+    st.plotly_chart(figs["status_funnel"], use_container_width=True)
     st.caption("**Task Status Funnel** – Visualizes the flow of tasks across statuses. "
                "Green = Completed, Red = Overdue, Blue = In Progress, Amber = Pending.")
 
 with c2:
-    fig2 = on_time_completion(f)
-    fig2.update_traces(marker_colors=["#4CAF50", "#F44336"])  # green vs red
-    st.plotly_chart(fig2, use_container_width=True)
+    st.plotly_chart(figs["on_time"], use_container_width=True)
     st.caption("**On-Time Completion** – Proportion of tasks finished on time (green) vs late (red). "
                "A higher green share means better discipline and accountability.")
 
@@ -100,16 +95,12 @@ st.subheader("📅 Task Timelines")
 
 c3, c4 = st.columns(2)
 with c3:
-    fig3 = tasks_histogram(f, field="start_date")
-    fig3.update_traces(marker_color="#2196F3")  # blue
-    st.plotly_chart(fig3, use_container_width=True)
+    st.plotly_chart(figs["start_dates"], use_container_width=True)
     st.caption("**Start Dates** – When tasks are typically launched. "
                "Helps spot project kickoff spikes.")
 
 with c4:
-    fig4 = tasks_histogram(f, field="due_date")
-    fig4.update_traces(marker_color="#FF9800")  # orange
-    st.plotly_chart(fig4, use_container_width=True)
+    st.plotly_chart(figs["due_dates"], use_container_width=True)
     st.caption("**Due Dates** – Task deadlines over time. "
                "Orange peaks signal heavy delivery periods that may need extra resources.")
 
@@ -120,12 +111,22 @@ st.markdown("---")
 # ------------------------------------------------
 st.subheader("📈 Performance Trends")
 
-fig5 = overdue_trend(f)
-fig5.update_traces(line_color="red", line=dict(width=3))
-st.plotly_chart(fig5, use_container_width=True)
+st.plotly_chart(figs["overdue_trend"], use_container_width=True)
 st.caption("**Overdue Task Trend** – Red line tracks overdue tasks over time. "
            "A downward trend = improved performance. An upward spike = risk building up.")
 
+c5, c6 = st.columns(2)
+with c5:
+    st.plotly_chart(figs["overdue_aging"], use_container_width=True)
+    st.caption("**Overdue Aging** – How long overdue tasks have been past due. "
+               "Growth in the 31–90 and 90+ bars means work is stalling, not just slipping.")
+with c6:
+    st.markdown("**Overdue by Owner**")
+    if aging_by_owner is not None and not aging_by_owner.empty:
+        st.dataframe(aging_by_owner, use_container_width=True)
+    else:
+        st.caption("No overdue tasks in the current filter.")
+
 st.markdown("---")
 
 # ------------------------------------------------
@@ -133,8 +134,19 @@ st.markdown("---")
 # ------------------------------------------------
 st.subheader("🏭 Workload by Industry")
 
-fig6 = workload_by_industry(f, clients, industries)
-fig6.update_traces(marker=dict(color=px.colors.qualitative.Set2))  # soft pastel palette
-st.plotly_chart(fig6, use_container_width=True)
+st.plotly_chart(figs["industry"], use_container_width=True)
 st.caption("**Workload Distribution** – How tasks are spread across industries. "
            "This helps identify sectors with the heaviest workload and where focus is needed.")
+
+st.markdown("---")
+
+# ------------------------------------------------
+# Section 5: Owner Workload & Capacity
+# ------------------------------------------------
+st.subheader("👥 Owner Workload & Capacity")
+
+st.plotly_chart(figs["owner_workload"], use_container_width=True)
+st.dataframe(team, use_container_width=True, hide_index=True)
+st.caption(f"**Owner Workload** – Open and overdue load per owner, completions in the last "
+           f"{owners.THROUGHPUT_WINDOW_DAYS} days and median start-to-completion time. "
+           "Owners spelled differently (case, spacing) are merged.")
@@ -1,9 +1,7 @@
 import streamlit as st
-import pydeck as pdk
 import pandas as pd
-import json
 import plotly.express as px
-from app_modules import db
+from app_modules import db, geo
 from app_modules.utils import df_from_records
 
 st.set_page_config(page_title="Regions & Heat Zones", page_icon="🗺️", layout="wide")
@@ -16,15 +14,12 @@ regions = df_from_records(db.list_table("regions"))
 clients = df_from_records(db.list_table("clients"))
 tasks = df_from_records(db.list_table("tasks"))
 
-with open("data/ghana_regions.geojson", "r") as f:
-    ghana_geojson = json.load(f)
-
 # ---- Prepare Activity Data ----
 REGION_COORDS = {r["name"]: (r["latitude"], r["longitude"]) for _, r in regions.iterrows()} if not regions.empty else {}
 
 activity_by_region = pd.DataFrame([
     {"region": name, "clients": 0, "open_tasks": 0, "completed_tasks": 0, "critical_tasks": 0}
-    for name in [f["properties"]["name"] for f in ghana_geojson["features"]]
+    for name in geo.region_names()
 ])
 
 if not clients.empty:
@@ -54,9 +49,6 @@ activity_by_region["completion_rate"] = (
 ).round(1)
 
 # ---- Map with PIN ICONS ----
-# ---- Map with PIN ICONS ----
-ICON_URL = "https://img.icons8.com/color/48/marker.png"
-
 # Attach coordinates
 activity_by_region["latitude"] = activity_by_region["region"].map(
     lambda r: REGION_COORDS[r][0] if r in REGION_COORDS else None
@@ -65,56 +57,9 @@ activity_by_region["longitude"] = activity_by_region["region"].map(
     lambda r: REGION_COORDS[r][1] if r in REGION_COORDS else None
 )
 
-pins = activity_by_region.dropna(subset=["latitude", "longitude"]).to_dict("records")
-
-icon_layer = pdk.Layer(
-    "IconLayer",
-    data=pins,
-    get_icon="icon_data",
-    get_size=4,
-    size_scale=10,
-    get_position=["longitude", "latitude"],
-    pickable=True,
-    icon_atlas=ICON_URL,
-    get_icon_anchor="bottom",
-)
-
-
-# Drop missing coords
-pins = activity_by_region.dropna(subset=["latitude", "longitude"]).to_dict("records")
-
-icon_layer = pdk.Layer(
-    "IconLayer",
-    data=pins,
-    get_icon="icon_data",
-    get_size=4,
-    size_scale=10,
-    get_position=["longitude", "latitude"],
-    pickable=True,
-    icon_atlas=ICON_URL,
-    get_icon_color=[0, 100, 200],
-    get_icon_anchor="bottom",
-)
-
-ghana_layer = pdk.Layer(
-    "GeoJsonLayer",
-    ghana_geojson,
-    opacity=0.2,
-    stroked=True,
-    filled=False,
-    extruded=False,
-    get_line_color=[80, 80, 80],
-)
-
-view_state = pdk.ViewState(latitude=7.9, longitude=-1.0, zoom=6)
-
-deck = pdk.Deck(
-    initial_view_state=view_state,
-    layers=[ghana_layer, icon_layer],
-    tooltip={
-        "html": "<b>{region}</b><br/>👥 Clients: {clients}<br/>📋 Open: {open_tasks}<br/>✅ Completed: {completed_tasks}<br/>🔴 Critical: {critical_tasks}"
-    },
-)
+data_version = db.table_versions(["regions", "clients", "tasks"])
+sites = clients[["latitude", "longitude"]].dropna() if {"latitude", "longitude"} <= set(clients.columns) else None
+deck = geo.region_deck(activity_by_region, data_version, sites=sites)
 
 st.pydeck_chart(deck, use_container_width=True)
 
@@ -1,128 +1,108 @@
-import io
-import pandas as pd
 import streamlit as st
-from app_modules import db
-from app_modules.utils import df_from_records
+from app_modules import db, dataio, geo, jobs, reports
 
 st.set_page_config(page_title="Data Admin", page_icon="🧰", layout="wide")
 db.init_db()
 
 st.title("🧰 Data Admin — Backup / Import / Maintenance")
+st.caption("Exports, imports and resets run as background jobs, so you can keep working while they finish.")
 
 st.subheader("Export")
 c1,c2 = st.columns(2)
 with c1:
     if st.button("Download CSV ZIP"):
-        dfs = {
-            "clients.csv": df_from_records(db.list_table("clients")),
-            "tasks.csv": df_from_records(db.list_table("tasks")),
-            "regions.csv": df_from_records(db.list_table("regions")),
-            "industries.csv": df_from_records(db.list_table("industries")),
-        }
-        import zipfile, tempfile, os
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".zip")
-        with zipfile.ZipFile(tmp.name, "w", zipfile.ZIP_DEFLATED) as z:
-            for name, df in dfs.items():
-                csv_bytes = df.to_csv(index=False).encode("utf-8")
-                z.writestr(name, csv_bytes)
-        with open(tmp.name, "rb") as f:
-            st.download_button("Download CSV Bundle", f, file_name="intertek_export.zip", mime="application/zip")
+        jobs.submit("export_csv", dataio.export_csv_zip)
 with c2:
     if st.button("Download Excel Workbook"):
-        out = io.BytesIO()
-        with pd.ExcelWriter(out, engine="xlsxwriter") as writer:
-            df_from_records(db.list_table("clients")).to_excel(writer, sheet_name="clients", index=False)
-            df_from_records(db.list_table("tasks")).to_excel(writer, sheet_name="tasks", index=False)
-            df_from_records(db.list_table("regions")).to_excel(writer, sheet_name="regions", index=False)
-            df_from_records(db.list_table("industries")).to_excel(writer, sheet_name="industries", index=False)
-        st.download_button("Download intertek.xlsx", data=out.getvalue(), file_name="intertek.xlsx")
+        jobs.submit("export_excel", dataio.export_excel)
 
 st.divider()
 
 st.subheader("Import")
+mode = st.radio(
+    "Import mode",
+    options=dataio.IMPORT_MODES,
+    format_func={"upsert": "Upsert — update matching rows, skip unchanged", "append": "Append — insert every row"}.get,
+    horizontal=True,
+)
+st.caption("Upserts match rows on an `external_id` column when the file has one. Without it, clients and regions "
+           "match by name and tasks by client + title + due date, so a task whose due date moved is added again.")
 tab1, tab2 = st.tabs(["CSV files", "Excel workbook"])
 
 with tab1:
     st.write("Upload any of: `clients.csv`, `tasks.csv`, `regions.csv`, `industries.csv`. Unknown files are ignored.")
+    st.caption("Files are applied industries → regions → clients → tasks. Links may use ids or names "
+               "(`industry`, `region`, `client` columns).")
     csvs = st.file_uploader("Upload one or more CSVs", type=["csv"], accept_multiple_files=True)
-    if csvs:
-        for file in csvs:
-            name = file.name.lower()
-            df = pd.read_csv(file)
-            if name == "industries.csv":
-                for _, r in df.iterrows():
-                    try:
-                        db.insert("industries", {"name": r.get("name")})
-                    except Exception:
-                        pass
-            elif name == "clients.csv":
-                for _, r in df.iterrows():
-                    payload = {k: r.get(k) for k in ["name","industry_id","region_id","contact_person","contact_email","contact_phone","notes","is_active"]}
-                    try:
-                        db.insert("clients", payload)
-                    except Exception:
-                        pass
-            elif name == "tasks.csv":
-                for _, r in df.iterrows():
-                    payload = {k: r.get(k) for k in ["title","client_id","owner","priority","status","start_date","due_date","completed_date","description"]}
-                    try:
-                        db.insert("tasks", payload)
-                    except Exception:
-                        pass
-            elif name == "regions.csv":
-                for _, r in df.iterrows():
-                    payload = {k: r.get(k) for k in ["name","country","latitude","longitude","weight","color","notes"]}
-                    try:
-                        db.insert("regions", payload)
-                    except Exception:
-                        pass
-        st.success("Import complete.")
+    if csvs and st.button(f"Import {len(csvs)} file(s)"):
+        jobs.submit("import_csv", dataio.import_csv_files, [(f.name, f.getvalue()) for f in csvs], mode=mode)
+        st.info("Import queued.")
 
 with tab2:
     xls = st.file_uploader("Upload Excel (.xlsx)", type=["xlsx"])
-    if xls:
-        x = pd.ExcelFile(xls)
-        for sheet in x.sheet_names:
-            df = x.parse(sheet)
-            s = sheet.lower()
-            if s == "industries":
-                for _, r in df.iterrows():
-                    try:
-                        db.insert("industries", {"name": r.get("name")})
-                    except Exception:
-                        pass
-            elif s == "clients":
-                for _, r in df.iterrows():
-                    payload = {k: r.get(k) for k in ["name","industry_id","region_id","contact_person","contact_email","contact_phone","notes","is_active"]}
-                    try:
-                        db.insert("clients", payload)
-                    except Exception:
-                        pass
-            elif s == "tasks":
-                for _, r in df.iterrows():
-                    payload = {k: r.get(k) for k in ["title","client_id","owner","priority","status","start_date","due_date","completed_date","description"]}
-                    try:
-                        db.insert("tasks", payload)
-                    except Exception:
-                        pass
-            elif s == "regions":
-                for _, r in df.iterrows():
-                    payload = {k: r.get(k) for k in ["name","country","latitude","longitude","weight","color","notes"]}
-                    try:
-                        db.insert("regions", payload)
-                    except Exception:
-                        pass
-        st.success("Excel import complete.")
+    if xls and st.button("Import workbook"):
+        jobs.submit("import_excel", dataio.import_excel, xls.getvalue(), mode=mode)
+        st.info("Excel import queued.")
 
 st.divider()
 st.subheader("Maintenance")
+if st.button("Reassign client regions from site coordinates"):
+    jobs.submit("reassign_regions", geo.reassign_client_regions)
+    st.info("Region reassignment queued.")
+if st.button("Render Analytics reports now"):
+    jobs.submit("render_reports", reports.render)
+    st.info("Report rendering queued.")
 if st.button("Reset ALL data (irreversible)"):
-    import os
-    path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "intertek.db"))
-    try:
-        os.remove(path)
-        db.init_db()
-        st.warning("Database reset. Default industries re-seeded.")
-    except FileNotFoundError:
-        db.init_db()
-        st.info("New database created.")
+    jobs.submit("reset", dataio.reset_database)
+    st.warning("Reset queued. Default industries will be re-seeded.")
+
+with st.expander("Write queue", expanded=False):
+    q = db.write_queue().stats()
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Queued writes", q["depth"])
+    m2.metric("Flushes", q["flushes"], help=f"{q['writes']} writes, {q['failed']} failed")
+    m3.metric("Avg flush", f"{q['avg_flush_ms']:.1f} ms", help=f"last {q['last_flush_ms']:.1f} ms, max {q['max_flush_ms']:.1f} ms")
+    m4.metric("Largest batch", q["max_batch_seen"])
+
+st.divider()
+
+# ------------------------------------------------
+# Background Jobs (polled while any are active)
+# ------------------------------------------------
+DOWNLOADS = {
+    "export_csv": ("intertek_export.zip", "application/zip"),
+    "export_excel": ("intertek.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+polling = jobs.has_active()
+
+@st.fragment(run_every=2 if polling else None)
+def jobs_panel():
+    st.subheader("Jobs")
+    recent = jobs.list_jobs(limit=10)
+    if polling and not any(j["status"] in jobs.ACTIVE_STATUSES for j in recent):
+        st.rerun()
+    if not recent:
+        st.caption("No jobs yet.")
+        return
+    for job in recent:
+        c1, c2, c3 = st.columns([3, 4, 2])
+        c1.write(f"**#{job['id']} {job['kind']}** — {job['status']}")
+        if job["status"] in jobs.ACTIVE_STATUSES:
+            c2.progress(job["progress"] or 0.0, text=job["message"] or "")
+            if c3.button("Cancel", key=f"cancel_{job['id']}"):
+                jobs.cancel(job["id"])
+        elif job["status"] == "Failed":
+            c2.error(job["error"] or "Failed")
+        elif job["status"] == "Completed" and job["kind"].startswith("import"):
+            summary = jobs.result(job["id"])
+            if summary:
+                c2.caption(" · ".join(f"{t}: {s['inserted']} added, {s['updated']} updated, {s['unchanged']} unchanged, "
+                                      f"{s['unresolved']} unresolved links" for t, s in summary.items()))
+        elif job["status"] == "Completed" and job["kind"] in DOWNLOADS:
+            data = jobs.result(job["id"])
+            if data is not None:
+                file_name, mime = DOWNLOADS[job["kind"]]
+                c3.download_button("Download", data=data, file_name=file_name, mime=mime, key=f"dl_{job['id']}")
+
+jobs_panel()
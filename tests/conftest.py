@@ -0,0 +1,12 @@
+import queue
+import pytest
+from app_modules import db
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr(db, "_writer", None)
+    monkeypatch.setattr(db, "_read_pool", queue.LifoQueue(maxsize=db.READ_POOL_SIZE))
+    db.init_db()
+    yield db
+    db._get_writer().close()
@@ -0,0 +1,32 @@
+from app_modules import db
+from app_modules.utils import apply_delta, df_from_records
+
+def test_delta_tracks_upserts_and_deletes(fresh_db):
+    a = db.insert("industries", {"name": "Delta A"})
+    b = db.insert("industries", {"name": "Delta B"})
+    first = db.fetch_delta("industries")
+    df = apply_delta(df_from_records([]), first)
+
+    db.update("industries", a, {"name": "Delta A2"})
+    db.delete("industries", b)
+    delta = db.fetch_delta("industries", first["version"])
+    assert not delta["full"]
+    assert [r["id"] for r in delta["upserts"]] == [a]
+    assert delta["deleted"] == [b]
+
+    df = apply_delta(df, delta)
+    assert df.equals(df_from_records(db.list_table("industries")))
+
+def test_retention_keeps_recent_history(fresh_db):
+    for i in range(5):
+        db.insert("industries", {"name": f"Kept {i}"})
+    before = db.current_version()
+    assert db.compact_change_log() == 0
+    assert len(db.changes_since(0, "industries")) >= 5
+
+    db.compact_change_log(max_rows=2)
+    assert len(db.changes_since(0, "industries")) == 2
+    assert db.table_versions(["industries"]) == (before,)
+    stale = db.fetch_delta("industries", before - 3)
+    assert stale["full"]
+    assert len(stale["upserts"]) == len(db.list_table("industries"))
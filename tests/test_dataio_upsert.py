@@ -0,0 +1,24 @@
+from app_modules import dataio, db
+
+def _csv(*lines):
+    return [("tasks.csv", "\n".join(("title,client,due_date",) + lines).encode())]
+
+def _tasks(title):
+    return db.list_table("tasks", "WHERE title = ?", (title,))
+
+def test_reimport_after_unresolved_client_matches(fresh_db):
+    db.insert("clients", {"name": "Acme"})
+    first = dataio.import_csv_files(_csv("T1,Acme,2024-03-01", "T2,Nobody,2024-03-02"))
+    assert first["tasks"]["unresolved"] == 1
+
+    again = dataio.import_csv_files(_csv("T1,Acme,2024-03-01"))
+    assert again["tasks"]["inserted"] == 0
+    assert len(_tasks("T1")) == 1
+
+def test_ui_task_adopted_by_mixed_import(fresh_db):
+    client = db.insert("clients", {"name": "Acme"})
+    db.insert("tasks", {"title": "T1", "client_id": client, "due_date": "2024-03-01"})
+
+    summary = dataio.import_csv_files(_csv("T1,Acme,2024-03-01", "T2,Nobody,2024-03-02"))
+    assert summary["tasks"]["inserted"] == 1
+    assert len(_tasks("T1")) == 1
@@ -0,0 +1,12 @@
+from app_modules import db
+
+def test_init_db_normalizes_task_dates(fresh_db):
+    ids = [db.insert("tasks", {"title": f"T{i}", "due_date": due})
+           for i, due in enumerate(["01/02/2024", "Jan 3 2024", "2024-01-04", "someday", None])]
+    with db.transaction() as conn:
+        conn.execute("PRAGMA user_version = 0")
+    db._initialized.clear()
+    db.init_db()
+
+    due = {r["id"]: r["due_date"] for r in db.list_table("tasks")}
+    assert [due[i] for i in ids] == ["2024-01-02", "2024-01-03", "2024-01-04", "someday", None]
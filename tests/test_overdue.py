@@ -0,0 +1,12 @@
+from app_modules import db, overdue, owners
+from app_modules.utils import df_from_records
+
+def test_overdue_owners_merge_like_owner_workload(fresh_db):
+    for owner in ["Ann Lee", "ann  lee", " ANN LEE", None, "", "Bo"]:
+        db.insert("tasks", {"title": "Late", "owner": owner, "status": "Open", "due_date": "2024-01-02"})
+    team = owners.team_stats().set_index("Owner")["Overdue"]
+    tasks = df_from_records(db.list_table("tasks"))
+
+    for by_owner in [overdue.overdue_summary()["by_owner"], overdue.summarize(tasks)["by_owner"]]:
+        assert by_owner["Total"].to_dict() == {"Ann Lee": 3, "Unassigned": 2, "Bo": 1}
+        assert by_owner["Total"].to_dict() == team[team > 0].to_dict()
@@ -0,0 +1,42 @@
+import sqlite3
+import pytest
+from app_modules import db
+
+def test_flush_commits_batch_once(fresh_db):
+    q = db.WriteQueue(flush_interval=0.5, max_batch=100)
+    statements = []
+    writer = db._get_writer()
+    writer.set_trace_callback(statements.append)
+    futures = [q.insert("industries", {"name": f"Queued {i}"}) for i in range(5)]
+    duplicate = q.insert("industries", {"name": "Queued 0"})
+    q.flush(5)
+    writer.set_trace_callback(None)
+
+    assert all(isinstance(f.result(), int) for f in futures)
+    with pytest.raises(sqlite3.IntegrityError):
+        duplicate.result()
+    verbs = [s.split()[0].upper() for s in statements]
+    assert verbs.count("BEGIN") == 1
+    assert verbs.count("COMMIT") == 1
+    assert verbs.count("SAVEPOINT") == 7  # five inserts, the duplicate and the flush barrier
+    assert q.stats()["flushes"] == 1
+    assert len(db.list_table("industries", "WHERE name LIKE 'Queued %'")) == 5
+
+def test_failed_commit_fails_whole_batch(fresh_db, monkeypatch):
+    # Deferred foreign keys are only checked at COMMIT, so the batch's writes
+    # all succeed and the commit is what fails.
+    monkeypatch.setitem(db._OPS, "defer_fks", lambda conn: conn.execute("PRAGMA defer_foreign_keys = ON"))
+    q = db.WriteQueue(flush_interval=0.5, max_batch=100)
+    futures = [
+        q.submit("defer_fks"),
+        q.insert("industries", {"name": "Rolled back"}),
+        q.insert("tasks", {"title": "Orphan", "client_id": 999}),
+    ]
+    with pytest.raises(sqlite3.IntegrityError):
+        q.flush(5)
+    for fut in futures:
+        with pytest.raises(sqlite3.IntegrityError):
+            fut.result()
+    assert q.stats()["failed"] == 4
+    assert not db.list_table("industries", "WHERE name = 'Rolled back'")
+    assert not db.list_table("tasks")